@@ -8,8 +8,10 @@
 import logger
 import os
 import sys
+import threading
 import time
 import tkinter
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from typing import Callable
 
 import customtkinter
@@ -18,15 +20,20 @@ import db_scanner
 import ui_helpers
 import pnp_editor_helpers
 import output
+import reference_index
 import board_view
+import csv_reader
 
 from pnp_editor_helpers import Marker
 from column_selector import ColumnsSelector, ColumnsSelectorResult
 from msg_box import MessageBox
+from snapshot_diff_window import SnapshotDiffWindow
 from tkhtmlview import HTMLLabel
 from components import Component, ComponentsDB, ComponentsMRU
 from config import Config
+from persistence import PersistScheduler
 from project import Project
+from reference_index import ReferenceIndex
 
 # -----------------------------------------------------------------------------
 
@@ -44,6 +51,28 @@ def get_db_directory() -> str:
     db_path = os.path.join(db_path, "db")
     return db_path
 
+def load_components_db(db_directory: str) -> ComponentsDB:
+    """Loads the components database; runs in the worker thread, so it must not touch the UI"""
+    components = ComponentsDB()
+    if os.path.isdir(db_directory):
+        components.load(db_directory)
+        logger.info(f"  Date: {components.db_date}")
+        logger.info(f"  Items: {len(components.components_all())}")
+    else:
+        logger.warning(f"DB folder not found at {db_directory}")
+    return components
+
+def prepare_editor_data(editor_data: pnp_editor_helpers.PnPEditorData, wip_items: list[dict],
+                        ref_prj: pnp_editor_helpers.RefItems, cancel: threading.Event) -> pnp_editor_helpers.PnPEditorData:
+    """Matches the editor items into the editor_data; runs in the worker thread, so it must not touch the UI"""
+    # selections made in the past projects, see the ComponentsInfo
+    history = ReferenceIndex(get_db_directory())
+    try:
+        return pnp_editor_helpers.prepare_editor_data(glob_components, glob_proj, wip_items, ref_prj,
+                                                      history if history.exists() else None, editor_data, cancel)
+    finally:
+        history.close()
+
 def get_logs_directory() -> str:
     logs_path = os.path.dirname(__file__)
     logs_path = os.path.join(logs_path, "..")
@@ -357,6 +386,12 @@ class HomeFrame(customtkinter.CTkFrame):
         Config.instance().save()
 
     def button_browse_wip_event(self):
+        if not self.app.components_db_ready:
+            MessageBox(app=self.app, dialog_type="o",
+                        message="The components database is still loading,\ntry again in a moment",
+                        callback=lambda btn: btn)
+            return
+
         # https://docs.python.org/3/library/dialog.html
         wip_path = tkinter.filedialog.askopenfile(
             mode="r",
@@ -412,11 +447,13 @@ class HomeFrame(customtkinter.CTkFrame):
                 # reset entire project
                 global glob_proj
                 sep_backup = glob_proj.pnp_separator
+                regex_backup = glob_proj.pnp_regex
                 # first_row_backup = glob_proj.pnp_first_row
                 loading_backup = glob_proj.loading
 
                 glob_proj = Project()
                 glob_proj.pnp_separator = sep_backup
+                glob_proj.pnp_regex = regex_backup
                 # glob_proj.pnp_first_row = first_row_backup
                 glob_proj.loading = loading_backup
                 glob_proj.pnp_path = pnp_paths[0]
@@ -451,7 +488,8 @@ class HomeFrame(customtkinter.CTkFrame):
             self.pnp_config.entry_first_row_var.set(str(int(recent_sett["pnp_first_row"]) + 1))
             self.pnp_config.entry_last_row_var.set(str(int(recent_sett["pnp_last_row"]) + 1))
             self.pnp_config.opt_separator_var.set(recent_sett["pnp_separator"])
-            self.pnp_config.btn_goto_editor.configure(state=tkinter.NORMAL)
+            self.pnp_config.update_entry_regex_state()
+            self.pnp_config.enable_goto_editor()
             # load the columns selection from the history
             last_colsel_result.deserialize(recent_sett["pnp_columns"])
             glob_proj.pnp_first_row = int(recent_sett["pnp_first_row"])
@@ -540,6 +578,7 @@ class PnPConfig(customtkinter.CTkFrame):
 
         # initial value
         self.column_selector = None
+        self.goto_editor_enabled = False
 
         #
         lbl_separator = customtkinter.CTkLabel(self, text="CSV\nSeparator:")
@@ -593,7 +632,21 @@ class PnPConfig(customtkinter.CTkFrame):
                                                 command=self.button_goto_editor_event)
         self.btn_goto_editor.grid(row=0, column=8, pady=5, padx=5, sticky="")
 
+        #
+        lbl_regex = customtkinter.CTkLabel(self, text="Regex:")
+        lbl_regex.grid(row=1, column=0, pady=5, padx=5, sticky="")
+
+        glob_proj.pnp_regex = Config.instance().pnp_regex
+        self.entry_regex = ui_helpers.EntryWithPPM(self, placeholder_text="(?P<id>\\S+)\\s+(?P<footprint>\\S+)\\s+...  ⮐")
+        self.entry_regex.grid(row=1, column=1, columnspan=6, padx=5, pady=5, sticky="we")
+        if glob_proj.pnp_regex:
+            self.entry_regex.foc_in()
+            self.entry_regex.set_text(glob_proj.pnp_regex)
+        self.entry_regex.bind("<Return>", self.entry_regex_return)
+        self.update_entry_regex_state()
+
     def opt_separator_event(self, new_sep: str):
+        self.update_entry_regex_state()
         if glob_proj.loading:
             return
 
@@ -601,6 +654,27 @@ class PnPConfig(customtkinter.CTkFrame):
         glob_proj.pnp_separator = new_sep
         self.button_load_pnp_preview_event()
 
+    def update_entry_regex_state(self):
+        regex_used = self.opt_separator_var.get() == "REGEX"
+        self.entry_regex.configure(state=tkinter.NORMAL if regex_used else tkinter.DISABLED)
+
+    def entry_regex_return(self, _event):
+        pnp_regex = self.entry_regex.get().strip()
+        try:
+            csv_reader.compile_regex(pnp_regex)
+        except ValueError as e:
+            logger.error(f"  PnP regex: {e}")
+            MessageBox(app=self.app, dialog_type="o",
+                        message=f"Cannot use the regular expression:\n\n{e}",
+                        callback=lambda btn: btn)
+            return
+
+        glob_proj.pnp_regex = pnp_regex
+        logger.info(f"  PnP regex: {glob_proj.pnp_regex}")
+        Config.instance().pnp_regex = glob_proj.pnp_regex
+        Config.instance().save()
+        self.button_load_pnp_preview_event()
+
     def var_first_row_event(self, sv: customtkinter.StringVar):
         if glob_proj.loading:
             return
@@ -669,6 +743,16 @@ class PnPConfig(customtkinter.CTkFrame):
         glob_proj.pnp_columns = result
         self.update_lbl_columns()
         if result.valid:
+            self.enable_goto_editor()
+
+    def enable_goto_editor(self):
+        # the editor needs the components DB: if it's still loading, the button is enabled when it's ready
+        self.goto_editor_enabled = True
+        if self.app.components_db_ready:
+            self.btn_goto_editor.configure(state=tkinter.NORMAL)
+
+    def components_db_ready_event(self):
+        if self.goto_editor_enabled:
             self.btn_goto_editor.configure(state=tkinter.NORMAL)
 
     def button_goto_editor_event(self):
@@ -703,6 +787,14 @@ class PnPEditor(customtkinter.CTkFrame):
 
         self.editor_data = pnp_editor_helpers.PnPEditorData()
         self.ref_prj = None
+        self.component_names: list[str] = []
+        # background matching, see load()
+        self.prepare_future: Future = None
+        self.prepare_cancel: threading.Event = None
+        self.prepare_total = 0
+        self.prepare_shown = 0
+        self.queued_db_changes: list[Callable] = []
+        """modifications of the glob_components requested while the items are matched"""
 
         # top toolbar
         if True:
@@ -773,6 +865,13 @@ class PnPEditor(customtkinter.CTkFrame):
             self.btn_page_next.grid(row=0, column=col, pady=5, padx=5, sticky="")
             col += 1
 
+            # visible only while the items are matched
+            self.btn_cancel_prepare = customtkinter.CTkButton(self.frame_toolbar, text="Stop matching",
+                                                              command=self.button_cancel_prepare_event, width=80)
+            self.btn_cancel_prepare.grid(row=0, column=col, pady=5, padx=5, sticky="")
+            self.btn_cancel_prepare.grid_remove()
+            col += 1
+
         # bottom toolbar
         if True:
             self.pgbar_selected = customtkinter.CTkProgressBar(self)
@@ -825,7 +924,7 @@ class PnPEditor(customtkinter.CTkFrame):
             return
 
         # the only case that causes automatic reload
-        if not filter and self.editor_data.last_filter_str:
+        if not filter and self.editor_data.last_filter_str and self.check_prepared():
             logger.debug("Component filter: <none>")
             self.editor_data.set_items_filter_str("")
             filter_idx = self.radio_filter_var.get()
@@ -836,6 +935,8 @@ class PnPEditor(customtkinter.CTkFrame):
             # self.entry_filter.put_placeholder()
 
     def entry_filter_return(self, _event):
+        if not self.check_prepared():
+            return
         filter = self.entry_filter_var.get()
         self.editor_data.set_items_filter_str(filter)
         filter_idx = self.radio_filter_var.get()
@@ -863,6 +964,10 @@ class PnPEditor(customtkinter.CTkFrame):
             self.lbl_pageno.configure(text=self.format_pageno())
 
     def radiobutton_event(self):
+        if not self.check_prepared():
+            # all items are shown while matching
+            self.radio_filter_var.set(0)
+            return
         filter_idx = self.radio_filter_var.get()
         logger.info(f"Selected component filter: {filter_idx}")
         self.editor_data.set_items_filter_type(filter_idx)
@@ -968,7 +1073,27 @@ class PnPEditor(customtkinter.CTkFrame):
             self.entry_descr_long.grid(row=2, column=0, columnspan=7, padx=15, pady=1, sticky="we")
             self.update_component_description_long("") # to activate placeholder text
 
+    def components_db_changed_event(self, modified_names: list[str]):
+        # the combo-boxes of the NOMATCH items use this list
+        self.component_names = glob_components.names_visible()
+
+        # the new components may match the items not configured yet
+        updated_items = pnp_editor_helpers.rematch_items(glob_components, self.editor_data.items_all(), modified_names)
+        if not updated_items:
+            return
+
+        logger.info(f"{len(updated_items)} editor items matched again after the DB modification")
+        for pnp_item in updated_items:
+            if not (wgt_idx := self.editor_data.item_filtered_paginated_index(pnp_item)) is None:
+                self.lbl_marker_list[wgt_idx].config(background=pnp_item.marker.color)
+                self.cbx_component_list[wgt_idx].set(pnp_item.editor_selection)
+                self.cbx_component_list[wgt_idx].configure(values=pnp_item.editor_cbx_items)
+                self.update_componentname_length_lbl(self.lbl_namelength_list[wgt_idx], pnp_item.editor_selection)
+        self.update_selected_status()
+
     def load(self, wip_items: list[dict] = None):
+        # the previous matching must end before the items are matched again
+        self.stop_prepare()
         self.btn_save.configure(state=tkinter.DISABLED)
         self.wip_items = wip_items
         self.radio_filter_var.set(0)
@@ -999,21 +1124,105 @@ class PnPEditor(customtkinter.CTkFrame):
             footprint_max_w = max(footprint_max_w, len(row[glob_proj.pnp_columns.footprint_col]))
             id_max_w = max(id_max_w, len(row[0]))
 
-        if True:
-            logger.info(f"Preparing editor data...")
-            started_at = time.monotonic()
-            try:
-                self.editor_data = pnp_editor_helpers.prepare_editor_data(glob_components, glob_proj, self.wip_items, self.ref_prj)
-            except Exception as e:
-                logger.error(f"Failed to prepare data: {e}")
-                return
-            delta = time.monotonic() - started_at
-            delta = f"{delta:.1f}s"
-            logger.info(f"  {len(self.editor_data.items_filtered())} items prepared in {delta}")
+        # match the items in the background; the pages are shown as soon as their items are ready
+        logger.info(f"Preparing editor data...")
+        self.editor_data = pnp_editor_helpers.PnPEditorData()
+        self.prepare_cancel = threading.Event()
+        self.prepare_total = pnp_editor_helpers.ItemsIterator(glob_proj, self.wip_items).length()
+        self.prepare_shown = -1
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="prepare_editor_data")
+        self.prepare_future = executor.submit(prepare_editor_data, self.editor_data, self.wip_items,
+                                              self.ref_prj, self.prepare_cancel)
+        executor.shutdown(wait=False)
+        self.btn_save_wip.configure(state=tkinter.DISABLED)
+        self.btn_cancel_prepare.grid()
+        self.poll_editor_data(self.prepare_future, time.monotonic())
+
+    def poll_editor_data(self, future: Future, started_at: float):
+        if future is not self.prepare_future:
+            # replaced by the next load()
+            return
 
+        # refresh the current page until all its items are ready; then leave it to the user
+        n_prepared = len(self.editor_data.items_all())
+        shown = min(n_prepared, self.editor_data.items_visible_offset() + self.editor_data.ITEMS_PER_PAGE)
+        if shown != self.prepare_shown:
+            self.prepare_shown = shown
+            self.editor_load_data()
         self.lbl_pageno.configure(text=self.format_pageno())
-        self.editor_load_data()
+
+        if not future.done():
+            self.pgbar_selected.set(n_prepared / max(1, self.prepare_total))
+            self.lbl_selected.configure(text=f"Matching {n_prepared} / {self.prepare_total}")
+            self.after(100, self.poll_editor_data, future, started_at)
+            return
+
+        self.btn_cancel_prepare.grid_remove()
+        try:
+            future.result()
+        except Exception as e:
+            # keep the items already prepared; the WiP is not saved, as the remaining items are missing
+            logger.error(f"Failed to prepare data: {e}")
+            self.editor_load_data()
+            self.lbl_pageno.configure(text=self.format_pageno())
+            self.update_selected_status()
+            self.apply_queued_db_changes()
+            return
+
+        if self.prepare_cancel.is_set():
+            logger.info("  Matching stopped: the remaining items are not configured")
+        delta = time.monotonic() - started_at
+        delta = f"{delta:.1f}s"
+        logger.info(f"  {len(self.editor_data.items_all())} items prepared in {delta}")
+        self.update_selected_status()
         self.btn_save_wip.configure(state=tkinter.ACTIVE)
+        self.apply_queued_db_changes()
+
+    def preparing(self) -> bool:
+        """Returns True while the items are matched in the background"""
+        return self.prepare_future is not None and not self.prepare_future.done()
+
+    def check_prepared(self) -> bool:
+        if self.preparing():
+            logger.warning("Wait until the editor items are matched, or stop the matching")
+            return False
+        return True
+
+    def modify_db(self, change: Callable):
+        """
+        Runs the modification of the glob_components now, or once the items are matched:
+        the matching thread uses the DB caches, dropped by every modification
+        """
+        if self.preparing():
+            logger.info("  DB modification queued until the editor items are matched")
+            self.queued_db_changes.append(change)
+        else:
+            change()
+
+    def apply_queued_db_changes(self):
+        (changes, self.queued_db_changes) = (self.queued_db_changes, [])
+        for change in changes:
+            try:
+                change()
+            except Exception as e:
+                logger.error(f"Queued DB modification failed: {e}")
+
+    def cancel_prepare(self):
+        """The items not matched yet are added as not configured"""
+        if self.prepare_cancel is not None:
+            self.prepare_cancel.set()
+
+    def stop_prepare(self):
+        """Stops the matching, waits until it ends and applies the DB modifications queued meanwhile"""
+        self.cancel_prepare()
+        if self.prepare_future is not None:
+            # the remaining items are added without matching: ends quickly
+            wait([self.prepare_future])
+        self.apply_queued_db_changes()
+
+    def button_cancel_prepare_event(self):
+        logger.info("Stop matching the editor items")
+        self.cancel_prepare()
 
     def editor_load_data(self):
         # Components table:
@@ -1090,19 +1299,20 @@ class PnPEditor(customtkinter.CTkFrame):
                 return
 
             self.apply_component_to_matching(wgt_idx, selected_component)
-            # update the MRU
-            glob_components.mru_items.on_select(pnp_item.editor_filter, selected_component)
-
-            # update drop-down list so it contains the new MRU items
-            filtered_comp_names = list(component.name for component in glob_components.components_filtered(pnp_item.editor_filter))
-            glob_components.mru_items.arrange(pnp_item.editor_filter, filtered_comp_names)
-
             pnp_item.editor_selection = selected_component
-            pnp_item.editor_cbx_items = filtered_comp_names
             pnp_item.marker.value = Marker.MAN_SEL
-            event.widget.configure(values=pnp_item.editor_cbx_items)
             self.btn_save.configure(state=tkinter.NORMAL)
 
+            def update_mru():
+                glob_components.mru_items.on_select(pnp_item.editor_filter, selected_component)
+                # update drop-down list so it contains the new MRU items
+                pnp_item.editor_cbx_items = glob_components.arranged_candidates(pnp_item.editor_filter)
+                if (wgt_idx := self.editor_data.item_filtered_paginated_index(pnp_item)) is not None:
+                    self.cbx_component_list[wgt_idx].configure(values=pnp_item.editor_cbx_items)
+
+            # the MRU is read by the matching thread, too
+            self.modify_db(update_mru)
+
     def apply_component_to_matching(self, wgt_idx: int, selected_component: str, force: bool = False):
         try:
             # get the selection details:
@@ -1159,9 +1369,13 @@ class PnPEditor(customtkinter.CTkFrame):
 
     def add_component_if_missing(self, new_component_name: str):
         new_component_name = new_component_name.strip()
-        if glob_components.add_if_not_exists(new_component_name):
-            logger.info(f"⭐New component '{new_component_name}' added to the database")
-            self.component_names.append(new_component_name)
+
+        def add():
+            if glob_components.add_if_not_exists(new_component_name):
+                logger.info(f"⭐New component '{new_component_name}' added to the database")
+                self.components_db_changed_event([new_component_name])
+
+        self.modify_db(add)
 
     # def combobox_key(self, event):
     #     logger.debug(f"CB key: {event}")
@@ -1287,10 +1501,8 @@ class PnPEditor(customtkinter.CTkFrame):
         wgt_idx = self.cbx_component_list.index(cbx)
 
         if len(filter) >= 2:
-            filtered_comp_names = list(item.name for item in glob_components.components_filtered(filter))
+            filtered_comp_names = glob_components.arranged_candidates(filter)
             logger.info(f"Apply filter '{filter}' -> {len(filtered_comp_names)} matching")
-            #
-            glob_components.mru_items.arrange(filter, filtered_comp_names)
 
             if pnp_item := self.editor_data.item_filtered_paginated(wgt_idx):
                 pnp_item.editor_filter = filter
@@ -1395,6 +1607,8 @@ class PnPEditor(customtkinter.CTkFrame):
             logger.debug(f"entry_focus_in: {e}")
 
     def button_save_wip_event(self):
+        if not self.check_prepared():
+            return
         logger.debug("Saving Work-In-Progress")
         wip_path = os.path.splitext(glob_proj.pnp_path)[0]
         wip_path += "_wip.json"
@@ -1410,6 +1624,8 @@ class PnPEditor(customtkinter.CTkFrame):
         pnp_editor_helpers.wip_save(wip_path, glob_proj.to_serializable(), self.editor_data)
 
     def button_save_event(self):
+        if not self.check_prepared():
+            return
         logger.debug("Save PnP")
         n_selected = self.count_selected()
         if n_selected[0] == n_selected[1]:
@@ -1472,13 +1688,22 @@ class ComponentsInfo(customtkinter.CTkFrame):
             frame_buttons = customtkinter.CTkFrame(self)
             frame_buttons.grid(row=0, column=1, sticky="")
 
-            btn_tou_scanner = customtkinter.CTkButton(frame_buttons, text="Tou scanner...",
+            # scanners merge into the DB, so they wait until it's loaded
+            self.btn_tou_scanner = customtkinter.CTkButton(frame_buttons, text="Tou scanner...", state=tkinter.DISABLED,
                                                     command=self.btn_tou_scanner_event)
-            btn_tou_scanner.grid(row=0, column=0, pady=5, padx=5, sticky="")
+            self.btn_tou_scanner.grid(row=0, column=0, pady=5, padx=5, sticky="")
 
-            btn_lib_scanner = customtkinter.CTkButton(frame_buttons, text="DevLib scanner...",
+            self.btn_lib_scanner = customtkinter.CTkButton(frame_buttons, text="DevLib scanner...", state=tkinter.DISABLED,
                                                     command=self.btn_devlib_scanner_event)
-            btn_lib_scanner.grid(row=1, column=0, pady=5, padx=5, sticky="")
+            self.btn_lib_scanner.grid(row=1, column=0, pady=5, padx=5, sticky="")
+
+            btn_snapshot_diff = customtkinter.CTkButton(frame_buttons, text="Snapshots diff...",
+                                                    command=self.btn_snapshot_diff_event)
+            btn_snapshot_diff.grid(row=2, column=0, pady=5, padx=5, sticky="")
+
+            self.btn_reference_index = customtkinter.CTkButton(frame_buttons, text="Reference index...",
+                                                    command=self.btn_reference_index_event)
+            self.btn_reference_index.grid(row=3, column=0, pady=5, padx=5, sticky="")
 
         self.grid_columnconfigure(0, weight=1)
         # self.grid_rowconfigure(0, weight=1)
@@ -1489,7 +1714,38 @@ class ComponentsInfo(customtkinter.CTkFrame):
     def btn_devlib_scanner_event(self):
         db_scanner.DbScanner(app=self.app, callback=self.scanner_callback, input_type="devlib")
 
-    def scanner_callback(self, action: str, input_type: str, new_components: ComponentsDB):
+    def btn_snapshot_diff_event(self):
+        SnapshotDiffWindow(app=self.app, db_folder=get_db_directory())
+
+    def btn_reference_index_event(self):
+        projects_folder = tkinter.filedialog.askdirectory(
+            title="Select the folder with the past projects *_wip.json files",
+            initialdir=None,
+        )
+        if not projects_folder:
+            return
+
+        # the folder tree may be large: build in the background, see poll_reference_index()
+        self.btn_reference_index.configure(state=tkinter.DISABLED)
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="reference_index_build")
+        self.reference_index_future: Future = executor.submit(reference_index.build, projects_folder, get_db_directory())
+        executor.shutdown(wait=False)
+        self.after(100, self.poll_reference_index)
+
+    def poll_reference_index(self):
+        if not self.reference_index_future.done():
+            self.after(100, self.poll_reference_index)
+            return
+
+        self.btn_reference_index.configure(state=tkinter.NORMAL)
+        try:
+            message = "Reference index built:\n\n" + self.reference_index_future.result()
+        except Exception as e:
+            logger.error(f"Error building the reference index: {e}")
+            message = f"Error building the reference index:\n\n{e}"
+        MessageBox(app=self.app, dialog_type="o", message=message, callback=lambda btn: btn)
+
+    def scanner_callback(self, action: str, input_type: str, components_dict: dict[str, set[str]]):
         logger.debug(f"Scanner {input_type}: {action}")
         if action == "o":
             # save to a CSV file
@@ -1499,15 +1755,31 @@ class ComponentsInfo(customtkinter.CTkFrame):
                 os.mkdir(db_directory)
             # since the user can add it's own components to the working database,
             # we only add a new components do the working db instead of replacing it with the new one
-            global glob_components
-            added = glob_components.add_new(new_components.components_all())
-            logger.info(f"Added {added} new components to the database")
-            glob_components.save_new(db_directory)
-            self.update_components_info()
-            # update components view
-            self.on_new_components_callback()
+            def merge():
+                report = glob_components.merge_scan(components_dict)
+                logger.info(f"Scanner results merged into the database: {report}")
+                glob_components.save_new(db_directory)
+                self.update_components_info()
+                self.app.pnp_editor.components_db_changed_event(report.added)
+                # update components view
+                self.on_new_components_callback()
+
+            self.app.pnp_editor.modify_db(merge)
+
+    def components_db_ready_event(self):
+        self.btn_tou_scanner.configure(state=tkinter.NORMAL)
+        self.btn_lib_scanner.configure(state=tkinter.NORMAL)
+        self.update_components_info()
 
     def update_components_info(self):
+        if not self.app.components_db_ready:
+            self.lblhtml_dbsummary.set_html(''\
+                '<h6>Components database</h6>'\
+                '<pre style="font-family: Consolas, monospace; font-size: 80%">'\
+                'Loading...\n'\
+                '</pre>')
+            return
+
         global glob_components
         count = glob_components.count_visible()
         hidden = glob_components.count_hidden()
@@ -1516,7 +1788,7 @@ class ComponentsInfo(customtkinter.CTkFrame):
             '<h6>Components database</h6>'\
             '<pre style="font-family: Consolas, monospace; font-size: 80%">'\
             f'Items:   <span style="color: Blue">{count}</span> (+ {hidden} hidden)\n'\
-            f'Created: <span style="color: Blue">{glob_components.db_date}</span>\n'\
+            f'Updated: <span style="color: Blue">{glob_components.db_date}</span>\n'\
             '</pre>'
 
         self.lblhtml_dbsummary.set_html(self.database_summary_html)
@@ -1575,12 +1847,20 @@ class ComponentsEditor(customtkinter.CTkFrame):
         self.btn_save.grid(row=0, column=5, pady=5, padx=5, sticky="e")
         self.btn_save.configure(state=tkinter.DISABLED)
 
-        #
+    def components_db_ready_event(self):
         global glob_components
+        self.components_info.components_db_ready_event()
         if not glob_components or len(glob_components.components_all()) == 0:
             logger.info("DB editor: components DB is empty")
         else:
+            self.reload_components()
+
+    def components_db_changed_event(self):
+        self.components_info.update_components_info()
+        if not self.changed:
+            # keep the page, but don't override the modifications entered by the user
             self.load_components()
+            self.lbl_pageno.configure(text=self.format_pageno())
 
     def reload_components(self):
         # reload view
@@ -1687,12 +1967,23 @@ class ComponentsEditor(customtkinter.CTkFrame):
         self.changed = True
 
     def store_component_modifications(self):
+        # read the widgets now: the page may be changed before the modifications are applied
+        modifications = []
         components_subrange = self.get_components()[self.components_pageno * self.COMP_PER_PAGE : ]
         for wgt_idx, component in enumerate(components_subrange):
             if wgt_idx == self.COMP_PER_PAGE:
                 break
-            component.hidden = self.vars_hidden[wgt_idx].get() == 1
-            component.aliases = self.entrys_alias[wgt_idx].get().strip()
+            modifications.append((component,
+                                  self.vars_hidden[wgt_idx].get() == 1,
+                                  self.entrys_alias[wgt_idx].get().strip()))
+
+        def update():
+            modified_names = [component.name for (component, hidden, aliases) in modifications
+                              if glob_components.update_component(component, hidden, aliases)]
+            if modified_names:
+                self.app.pnp_editor.components_db_changed_event(modified_names)
+
+        self.app.pnp_editor.modify_db(update)
 
     def on_component_attr_changed(self, btn: str, go_next: bool):
         if btn == "y":
@@ -1740,11 +2031,15 @@ class ComponentsEditor(customtkinter.CTkFrame):
 
     def button_save_event(self):
         self.store_component_modifications()
-        glob_components.save_changes()
-        logger.info(f"DB saved to '{glob_components.db_file_path}'")
-        self.btn_save.configure(state=tkinter.DISABLED)
-        self.components_info.update_components_info()
-        self.changed = False
+
+        def save():
+            glob_components.save_changes()
+            logger.info(f"DB saved to '{glob_components.db_file_path}'")
+            self.btn_save.configure(state=tkinter.DISABLED)
+            self.components_info.update_components_info()
+            self.changed = False
+
+        self.app.pnp_editor.modify_db(save)
 
 # -----------------------------------------------------------------------------
 
@@ -1753,6 +2048,7 @@ class CtkApp(customtkinter.CTk):
     TAB_PREVIEW = "PnP Preview"
     TAB_EDITOR = "PnP Editor"
     TAB_COMPONENTS = "DB Components"
+    DB_SYNC_INTERVAL_MS = 5000
 
     def __init__(self):
         logger.info('Ctk app is starting')
@@ -1778,19 +2074,12 @@ class CtkApp(customtkinter.CTk):
         tab_home.grid_columnconfigure(0, weight=1)
         # tab_home.grid_rowconfigure(1, weight=1)
 
-        #
-        try:
-            global glob_components
-            glob_components = ComponentsDB()
-            db_directory = get_db_directory()
-            if os.path.isdir(db_directory):
-                glob_components.load(db_directory)
-                logger.info(f"  Date: {glob_components.db_date}")
-                logger.info(f"  Items: {len(glob_components.components_all())}")
-            else:
-                logger.warning(f"DB folder not found at {db_directory}")
-        except Exception as e:
-            logger.error(f"Error loading database: {e}")
+        # load the DB in the background, while the UI is built; see poll_components_db()
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="components_db")
+        self.components_db_ready = False
+        """set when the loaded DB replaced the glob_components"""
+        self.components_db_future: Future = executor.submit(load_components_db, get_db_directory())
+        executor.shutdown(wait=False)
 
         # panel with the PnP
         self.pnp_view = PnPView(tab_preview)
@@ -1829,6 +2118,37 @@ class CtkApp(customtkinter.CTk):
 
         # UI ready
         logger.info('Application ready.')
+        self.after(50, self.poll_components_db)
+        self.protocol("WM_DELETE_WINDOW", self.on_closing)
+
+    def on_closing(self):
+        # apply the DB modifications queued while the items are matched, while the widgets still exist
+        self.pnp_editor.stop_prepare()
+        self.destroy()
+
+    def poll_components_db(self):
+        if not self.components_db_future.done():
+            self.after(50, self.poll_components_db)
+            return
+
+        global glob_components
+        try:
+            glob_components = self.components_db_future.result()
+        except Exception as e:
+            logger.error(f"Error loading database: {e}")
+        self.components_db_ready = True
+
+        # components DB is ready: update the dependent views
+        self.components_editor.components_db_ready_event()
+        self.pnp_config.components_db_ready_event()
+        self.after(self.DB_SYNC_INTERVAL_MS, self.sync_components_db)
+
+    def sync_components_db(self):
+        # DB folder may be shared with other workstations; not while the editor items are matched
+        if not self.pnp_editor.preparing() and (modified_names := glob_components.sync()):
+            self.components_editor.components_db_changed_event()
+            self.pnp_editor.components_db_changed_event(modified_names)
+        self.after(self.DB_SYNC_INTERVAL_MS, self.sync_components_db)
 
     def get_tab_select_editor_fn(self) -> Callable:
         # return a closure
@@ -1859,7 +2179,7 @@ if __name__ == "__main__":
     ctkapp = CtkApp()
     ctkapp.mainloop()
 
-    # app exitting
+    # app exitting: the matching thread is stopped in on_closing(), the DB is not used anymore
     if glob_components.dirty:
         logger.info('Saving the components database...')
         glob_components.save_changes()
@@ -1868,4 +2188,9 @@ if __name__ == "__main__":
         logger.info('Saving the most recent used components (MRU list)...')
         glob_components.mru_items.save_changes()
 
+    # write the MRU and config saved in the background
+    PersistScheduler.instance().flush()
+
+    glob_components.wait_compaction()
+
     logger.info('Program ended.')
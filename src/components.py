@@ -1,31 +1,45 @@
 import logger
 import os
 import time
+import bisect
 import csv
 import fnmatch
+import re
+import hashlib
+import heapq
+import io
+import operator
+import sys
+import threading
+
+import natsort
+
+import text_encoding
+import value_canon
+from persistence import PersistScheduler
+from components_journal import ComponentsJournal
+from components_manifest import SnapshotsManifest
+from components_ranker import NameRanker
+from components_store import ComponentsStore
+
+# -----------------------------------------------------------------------------
+
+NATURAL_KEY = natsort.natsort_keygen()
+"""Key of the natural order, used by the components DB: "R0603_2k" < "R0603_10k" """
 
 # -----------------------------------------------------------------------------
 
 class Component:
-    def __init__(self, **kwargs) -> None:
-        self.name = ""
-        """Original component name, eg "R0603_1k" """
-        if "name" in kwargs:
-            self.name = kwargs.pop("name")
+    # no per-instance __dict__: the DB keeps up to hundreds of thousands of components
+    __slots__ = ("name", "hidden", "aliases")
 
-        self.hidden = False
+    def __init__(self, name: str = "", hidden: bool = False, aliases: str = "") -> None:
+        self.name = sys.intern(name)
+        """Original component name, eg "R0603_1k" """
+        self.hidden = hidden if isinstance(hidden, bool) else False
         """Known, but don't show on the list"""
-        if "hidden" in kwargs:
-            hid = kwargs.pop("hidden")
-            if isinstance(hid, bool):
-                self.hidden = hid
-
-        self.aliases = ""
+        self.aliases = aliases if isinstance(aliases, str) else ""
         """Semicolon-separated alternative names"""
-        if "aliases" in kwargs:
-            al = kwargs.pop("aliases")
-            if isinstance(al, str):
-                self.aliases = al
 
     # def get_aliases(self) -> list[str]:
     #     al = self.aliases.split(";")
@@ -35,8 +49,8 @@ class Component:
     #     self.aliases = al.join(";")
 
     def __lt__(self, other) -> bool:
-        # required by sort()
-        return self.name < other.name
+        # required by sort(); the ComponentsDB keeps the keys of its components, see __sort()
+        return NATURAL_KEY(self.name) < NATURAL_KEY(other.name)
 
 # -----------------------------------------------------------------------------
 
@@ -46,6 +60,8 @@ class ComponentMRU:
     def __init__(self, fltr="", mru_components:list[str]=None):
         self.filter = fltr
         self.mru = mru_components if mru_components else []
+        self.revision = 0
+        """incremented on every modification of the mru list"""
 
     def on_select(self, selection: str):
         """put the new selection on the top of the MRU list"""
@@ -55,6 +71,7 @@ class ComponentMRU:
             pass
         finally:
             self.mru.insert(0, selection)
+            self.revision += 1
 
     def __lt__(self, other) -> bool:
         # required by sort()
@@ -67,7 +84,8 @@ class ComponentsMRU:
     SPACER_ITEM = "————————=————————=————————=————————"
 
     def __init__(self):
-        self.mru: list[ComponentMRU] = []
+        self.mru: dict[str, ComponentMRU] = {}
+        """filter : MRU of that filter"""
         self.__db_folder = ""
         self.dirty = False
 
@@ -83,9 +101,11 @@ class ComponentsMRU:
                 self._load_csv(lru_file_path)
 
     def save_changes(self):
-        self.mru.sort()
+        """Schedule writing the MRU in the background"""
+        if not self.__db_folder:
+            return
         mru_file_path = os.path.join(self.__db_folder, "mru.csv")
-        self._save_csv(mru_file_path)
+        PersistScheduler.instance().schedule(mru_file_path, self._format_csv())
         # remove old file
         lrupath = os.path.join(self.__db_folder, "lru.csv")
         if os.path.isfile(lrupath):
@@ -97,31 +117,29 @@ class ComponentsMRU:
         if not filter:
             return
 
-        for component in self.mru:
-            if component.filter == filter:
-                # if MRU list is not empty
-                if component.mru:
-                    # make a sets, remove from items_to_arrange items found in MRU
-                    mru_set = set(component.mru)
-                    to_arrange_set = set(items_to_arrange)
-                    to_arrange_set -= mru_set
-                    # put remaining items back into the items_to_arrange list
-                    items_to_arrange.clear()
-                    items_to_arrange.extend(to_arrange_set)
-                    items_to_arrange.sort()
-                    items_to_arrange.insert(0, self.SPACER_ITEM)
-                    # insert MRU at the top of items_to_arrange
-                    for item in component.mru[::-1]:
-                        items_to_arrange.insert(0, item)
-                return
+        if component := self.mru.get(filter):
+            # if MRU list is not empty
+            if component.mru:
+                # items_to_arrange are already in order: only remove the MRU items,
+                # and put them at the top, separated with a spacer
+                mru_set = set(component.mru)
+                remaining = [item for item in items_to_arrange if item not in mru_set]
+                items_to_arrange[:] = component.mru + [self.SPACER_ITEM] + remaining
+            return
         # not found? create a new entry, with empty MRU
-        self.mru.append(ComponentMRU(filter))
+        self.mru[filter] = ComponentMRU(filter)
         self.dirty = True
 
+    def revision(self, filter: str) -> int:
+        """Returns the revision of the filter MRU list, or -1 if there is no such filter"""
+        if component := self.mru.get(filter.strip()):
+            return component.revision
+        return -1
+
     def get_all_mru_components(self) -> set[str]:
         """returns a set of all components used in a MRU lists"""
         all = set()
-        for component_mru in self.mru:
+        for component_mru in self.mru.values():
             for mru_item in component_mru.mru:
                 all.add(mru_item)
         return all
@@ -130,7 +148,7 @@ class ComponentsMRU:
         if invalid:
             # not empty? proceed
             logger.debug("MRU cleanup")
-            for component_mru in self.mru:
+            for component_mru in self.mru.values():
                 toremove = []
                 for mru_item in component_mru.mru:
                     if mru_item in invalid:
@@ -138,17 +156,19 @@ class ComponentsMRU:
                 for rem in toremove:
                     logger.debug(f"  remove '{rem}'")
                     component_mru.mru.remove(rem)
+                    component_mru.revision += 1
                     self.dirty = True
 
     def on_select(self, filter: str, selection: str):
         if not filter:
             return
 
-        for mru_item in self.mru:
-            if mru_item.filter == filter:
-                mru_item.on_select(selection)
-                self.dirty = True
-                break
+        if mru_item := self.mru.get(filter):
+            mru_item.on_select(selection)
+            # only the limited number of items is saved
+            del mru_item.mru[self.MRU_MAX_LEN:]
+            self.dirty = True
+            self.save_changes()
 
     def _iterate_reader(self, csv_file):
         reader = csv.reader(csv_file, delimiter="\t")
@@ -156,37 +176,55 @@ class ComponentsMRU:
         for row in reader:
             row_cells = [cell.strip() for cell in row]
             if len(row_cells) > 0:
-                self.mru.append(ComponentMRU(row_cells[0], row_cells[1:]))
+                self.mru[row_cells[0]] = ComponentMRU(row_cells[0], row_cells[1:])
 
     def _load_csv(self, path: str):
         if os.path.exists(path):
             try:
-                f = open(path, "r", encoding="utf-8")
-                self._iterate_reader(f)
+                text_encoding.read_file(path, self._iterate_reader)
             except Exception as e:
-                logger.error(f"  MRU: not an UTF-8 encoding")
+                logger.error(f"  MRU: cannot read the file: {e}")
         else:
                 logger.warning(f"  MRU file not found")
 
-    def _save_csv(self, path: str):
-        with open(path, "w", encoding="utf-8") as f:
-            for mru_item in self.mru:
-                # only items with not-empty MRU list
-                if mru_item.mru:
-                    f.write(f"\"{mru_item.filter}\"")
-                    # store a limited number of recently used
-                    for idx, comp in enumerate(mru_item.mru):
-                        if idx == self.MRU_MAX_LEN:
-                            break
-                        if comp: # only not-empty entries
-                            f.write(f"\t\"{comp}\"")
-                    f.write("\n")
+    def _format_csv(self) -> str:
+        f = io.StringIO()
+        for (_, mru_item) in sorted(self.mru.items()):
+            # only items with not-empty MRU list
+            if mru_item.mru:
+                f.write(f"\"{mru_item.filter}\"")
+                # store a limited number of recently used
+                for idx, comp in enumerate(mru_item.mru):
+                    if idx == self.MRU_MAX_LEN:
+                        break
+                    if comp: # only not-empty entries
+                        f.write(f"\t\"{comp}\"")
+                f.write("\n")
+        return f.getvalue()
+
+
+# -----------------------------------------------------------------------------
+
+class MergeReport:
+    """Result of merging the scanner results into the components DB"""
+
+    def __init__(self):
+        self.added: list[str] = []
+        """scanned components, that were not in the DB"""
+        self.unchanged = 0
+        """number of scanned components already present in the DB"""
+        self.not_scanned = 0
+        """number of DB components not found by the scanner; they are kept in the DB"""
 
+    def __str__(self) -> str:
+        return f"{len(self.added)} added, {self.unchanged} unchanged, {self.not_scanned} not found by the scanner"
 
 # -----------------------------------------------------------------------------
 
 class ComponentsDB:
     FILENAME_DATE_FMT = "%Y%m%d_%H%M%S"
+    JOURNAL_COMPACTION_THRESHOLD = 200
+    SNAPSHOTS_KEEP = 20
 
     def __init__(self, **kwargs):
         self.db_date = ""
@@ -194,7 +232,34 @@ class ComponentsDB:
         self.db_file_path = ""
         """full filepath"""
         self.__components: list[Component] = []
-        """list of components"""
+        """list of components, always in the natural order"""
+        self.__sort_keys: list = []
+        """sort keys of the __components, for the bisect"""
+        self.__components_by_alias: dict[str, Component] = {}
+        """case-folded alias : component"""
+        self.__ranker: NameRanker = None
+        """fuzzy ranking of the visible names, created on demand"""
+        self.__canonical: dict[str, Component] = None
+        """canonical name : visible component, created on demand"""
+        self.__candidates: dict[tuple[str, str], tuple[int, list[str]]] = {}
+        """(MRU filter, needle) : (MRU revision, arranged names)"""
+        self.__filtered: dict[str, list[str]] = {}
+        """needle : names of the visible components matching it"""
+        self.__store: ComponentsStore = None
+        """persistent storage"""
+        self.__journal: ComponentsJournal = None
+        """log of modifications made since the last compaction"""
+        self.__compaction: threading.Thread = None
+        self.__manifest: SnapshotsManifest = None
+        """pointer to the current CSV snapshot"""
+        self.__changed: dict[str, Component] = {}
+        """components modified, but not yet written to the journal"""
+        self.generation = 0
+        """number of commits made to the store"""
+        self.__generation_lock = threading.Lock()
+        """the generation is updated by the sync() and the compaction thread"""
+        self.__watch_stamp = None
+        """modification times of the store and the journal, seen by the last sync()"""
         self.dirty = False
         """list updated during operation"""
         self.mru_items = ComponentsMRU()
@@ -207,49 +272,315 @@ class ComponentsDB:
             for item in components_dict.items():
                 # add all component variants into the same flat list
                 self.__components.extend([Component(name=subitem) for subitem in item[1]])
-            self.__components.sort()
+            self.__sort()
 
     def load(self, db_folder: str):
-        """Load latest database version"""
+        """Load the database from the store; for the first time, import the latest CSV snapshot"""
         logger.info(f"Initialize components database: {db_folder}")
-        db_path_list = []
+        self.__store = ComponentsStore(db_folder)
+        self.__manifest = SnapshotsManifest(db_folder)
+
+        if self.__store.exists():
+            logger.info(f"Loading components from: {ComponentsStore.FILE_NAME}")
+            (self.generation, self.db_date, rows) = self.__store.load()
+            self.__components = [Component(name=name, hidden=hidden, aliases=aliases)
+                                 for (name, hidden, aliases) in rows]
+            self.__sort()
+        elif self.__load_latest_snapshot(db_folder):
+            logger.info(f"Import {len(self.__components)} components to the {ComponentsStore.FILE_NAME}")
+            self.__write_store(self.__components)
+        else:
+            logger.warning(f"No DB files found in {db_folder}")
+            return
+
+        if not self.__manifest.load():
+            self.__start_manifest(db_folder)
+
+        self.db_file_path = self.__store.path
+        self.__journal = ComponentsJournal(db_folder)
+        self.__replay_journal()
+        self.__watch_stamp = self.__files_stamp()
+
+        # read the MRU
+        self.mru_items.load(db_folder)
+        all_visible = set(self.names_visible())
+        # get components in mru, that are not in the all_visible
+        invalid_mru = self.mru_items.get_all_mru_components()
+        invalid_mru -= all_visible
+        self.mru_items.remove_invalid_mru_components(invalid_mru)
+
+    @staticmethod
+    def __list_snapshots(db_folder: str) -> list[str]:
+        """Returns file names of the CSV snapshots, the newest first"""
+        db_fname_list = []
         for de in os.scandir(db_folder):
             db_fname: str = os.path.basename(de.path)
             if db_fname.startswith("components__") and db_fname.endswith(".csv"):
-                logger.debug("  DB path: " + de.path)
-                db_path_list.append(de.path)
-
-        # if not empty
-        if db_path_list:
-            # sort files list to get the latest version
-            db_path_list.sort(reverse=True)
-            last_db_path = db_path_list[0]
-            # extract filename from path
-            db_fname: str = os.path.basename(last_db_path)
-            logger.info(f"Loading components from: {db_fname}")
-            # extract date part from filename
+                db_fname_list.append(db_fname)
+        # the names contain the date
+        db_fname_list.sort(reverse=True)
+        return db_fname_list
+
+    def __load_latest_snapshot(self, db_folder: str) -> bool:
+        """Load latest CSV database version"""
+        if not (db_fname_list := self.__list_snapshots(db_folder)):
+            return False
+        return self.__load_snapshot(os.path.join(db_folder, db_fname_list[0]))
+
+    def __start_manifest(self, db_folder: str):
+        """
+        The first manifest lists all the existing snapshots,
+        so the older ones are archived by the retention policy, when the next snapshot is written
+        """
+        if not (db_fname_list := self.__list_snapshots(db_folder)):
+            return
+        try:
+            self.__manifest.adopt(db_fname_list)
+            logger.info(f"Snapshots manifest created with {len(db_fname_list)} snapshots")
+        except Exception as e:
+            logger.warning(f"Unable to save the manifest '{self.__manifest.path}': {e}")
+
+    def __load_snapshot(self, db_path: str) -> bool:
+        """Load the CSV snapshot"""
+        # extract filename from path
+        db_fname: str = os.path.basename(db_path)
+        logger.info(f"Loading components from: {db_fname}")
+        try:
+            with open(db_path, "rb") as f:
+                content = f.read()
+        except Exception as e:
+            logger.warning(f"Unable to read the snapshot: {e}")
+            return False
+
+        # read csv file; older DB files were not saved as UTF-8 - choose the codec once, for the entire file
+        encoding = text_encoding.detect_bytes(content, True)
+        self._iterate_reader(io.StringIO(content.decode(encoding, errors="replace"), newline=""))
+        self.__sort()
+
+        # extract date part from filename
+        try:
+            # throw away the extension
+            self.db_date = db_fname.split("__")[1].split(".")[0]
+            time_tuple = time.strptime(self.db_date, self.FILENAME_DATE_FMT)
+            self.db_date = time.strftime("%Y-%m-%d, %H:%M:%S", time_tuple)
+        except Exception as e:
+            logger.warning(f"Unable to parse file datetime: {e}")
+            self.db_date = "?, ?"
+        return True
+
+    def __write_store(self, components: list[Component]):
+        rows = [(component.name, component.hidden, component.aliases) for component in components]
+        (self.generation, self.db_date) = self.__store.write(rows)
+
+    def __replay_journal(self):
+        """Apply modifications, not yet compacted into the store"""
+        rows = self.__journal.replay()
+        if not rows:
+            return
+
+        logger.info(f"Replaying {len(rows)} journal entries")
+        self.__apply_rows(rows)
+
+        if self.__journal.count > self.JOURNAL_COMPACTION_THRESHOLD:
+            self.__start_compaction()
+
+    def __apply_rows(self, rows: list[tuple[str, bool, str]]) -> list[str]:
+        """Apply rows written by this or other instance; returns names of the actually modified components"""
+        modified = {}
+        added = {}
+        for (name, hidden, aliases) in rows:
+            if component := (added.get(name) or self.__find(name)):
+                if component.hidden != hidden or component.aliases != aliases:
+                    component.hidden = hidden
+                    self.__set_aliases(component, aliases)
+                    modified[name] = True
+            else:
+                added[name] = Component(name=name, hidden=hidden, aliases=aliases)
+                modified[name] = True
+
+        self.__insert(list(added.values()))
+        if modified:
+            self.__names_changed()
+        return list(modified)
+
+    def __names_changed(self):
+        # drop everything computed from the names
+        self.__ranker = None
+        self.__canonical = None
+        self.__candidates.clear()
+        self.__filtered.clear()
+
+    def __find(self, name: str) -> Component:
+        """Binary search of the component with a given name"""
+        sort_key = NATURAL_KEY(name)
+        idx = bisect.bisect_left(self.__sort_keys, sort_key)
+        while idx < len(self.__components) and self.__sort_keys[idx] == sort_key:
+            if self.__components[idx].name == name:
+                return self.__components[idx]
+            idx += 1
+        return None
+
+    def __files_stamp(self) -> tuple:
+        stamp = []
+        for path in (self.__store.path, self.__journal.path):
             try:
-                # throw away the extension
-                self.db_date = db_fname.split("__")[1].split(".")[0]
-                time_tuple = time.strptime(self.db_date, self.FILENAME_DATE_FMT)
-                self.db_date = time.strftime("%Y-%m-%d, %H:%M:%S", time_tuple)
-            except Exception as e:
-                logger.warning(f"Unable to parse file datetime: {e}")
-                self.db_date = "?, ?"
-
-            # read csv file
-            self._load_csv(last_db_path)
-            self.db_file_path = last_db_path
-
-            # read the MRU
-            self.mru_items.load(db_folder)
-            all_visible = set(self.names_visible())
-            # get components in mru, that are not in the all_visible
-            invalid_mru = self.mru_items.get_all_mru_components()
-            invalid_mru -= all_visible
-            self.mru_items.remove_invalid_mru_components(invalid_mru)
-        else:
-            logger.warning(f"No DB files found in {db_folder}")
+                st = os.stat(path)
+                stamp.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                stamp.append(None)
+        return tuple(stamp)
+
+    def sync(self) -> list[str]:
+        """
+        Apply modifications made by other instances sharing the DB folder.
+        Cheap if nothing has changed: only the store and journal files are stat'ed.
+        Returns names of the modified components.
+        """
+        if self.__store is None or self.__journal is None:
+            return []
+
+        stamp = self.__files_stamp()
+        if stamp == self.__watch_stamp:
+            return []
+
+        rows = []
+        try:
+            with self.__generation_lock:
+                generation = self.__store.generation()
+                if generation > self.generation:
+                    # journal compacted (possibly by another instance): take the rows committed since our generation
+                    rows = self.__store.rows_since(self.generation)
+                    rows.extend(self.__journal.replay())
+                    self.generation = generation
+                else:
+                    rows = self.__journal.read_new()
+        except Exception as e:
+            # eg. the store locked by other instance: retried at the next sync()
+            logger.warning(f"Components DB sync failed: {e}")
+            return []
+        self.__watch_stamp = stamp
+
+        modified = self.__apply_rows(rows)
+        if modified:
+            logger.info(f"Components DB sync: {len(modified)} components modified by other instance")
+        return modified
+
+    def __sort(self):
+        self.__names_changed()
+        # each key computed once, and kept only in the __sort_keys
+        keyed = sorted(((NATURAL_KEY(component.name), component) for component in self.__components),
+                       key=operator.itemgetter(0))
+        self.__sort_keys = [key for (key, _) in keyed]
+        self.__components = [component for (_, component) in keyed]
+        self.__components_by_alias = {}
+        for component in self.__components:
+            self.__index_aliases(component)
+
+    @staticmethod
+    def __split_aliases(aliases: str) -> list[str]:
+        return [alias.strip().casefold() for alias in aliases.split(";") if alias.strip()]
+
+    def __index_aliases(self, component: Component):
+        for alias in self.__split_aliases(component.aliases):
+            # alias used by many components: the first one wins
+            if alias not in self.__components_by_alias:
+                self.__components_by_alias[alias] = component
+
+    def __set_aliases(self, component: Component, aliases: str):
+        for alias in self.__split_aliases(component.aliases):
+            if self.__components_by_alias.get(alias) is component:
+                del self.__components_by_alias[alias]
+        component.aliases = aliases
+        self.__index_aliases(component)
+
+    def __insert(self, new_components: list[Component]):
+        """Insert keeping the natural order"""
+        if new_components:
+            self.__names_changed()
+        if len(new_components) > 64:
+            # many at once (DB scanner): merge the sorted new ones in a single pass
+            new_keyed = sorted(((NATURAL_KEY(component.name), component) for component in new_components),
+                               key=operator.itemgetter(0))
+            keyed = list(heapq.merge(zip(self.__sort_keys, self.__components), new_keyed, key=operator.itemgetter(0)))
+            self.__sort_keys = [key for (key, _) in keyed]
+            self.__components = [component for (_, component) in keyed]
+            for component in new_components:
+                self.__index_aliases(component)
+            return
+
+        for component in new_components:
+            sort_key = NATURAL_KEY(component.name)
+            idx = bisect.bisect_right(self.__sort_keys, sort_key)
+            self.__sort_keys.insert(idx, sort_key)
+            self.__components.insert(idx, component)
+            self.__index_aliases(component)
+
+    def __mark_changed(self, component: Component):
+        self.__names_changed()
+        self.__changed[component.name] = component
+        self.dirty = True
+
+    def __write_journal(self):
+        """Log all pending modifications at once"""
+        if self.__journal is None or not self.__changed:
+            return
+
+        rows = [(component.name, component.hidden, component.aliases) for component in self.__changed.values()]
+        try:
+            self.__journal.append(rows)
+            self.__changed.clear()
+            self.dirty = False
+        except Exception as e:
+            logger.error(f"Error writing to the journal '{self.__journal.path}': {e}")
+
+    def __start_compaction(self):
+        """Move the journal entries to the store and save a new snapshot, in the background"""
+        if self.__compaction and self.__compaction.is_alive():
+            return
+
+        try:
+            (journal_rows, unread_rows) = self.__journal.begin_compaction()
+        except Exception as e:
+            logger.error(f"Error starting the journal compaction: {e}")
+            return
+
+        # the snapshot must contain all the compacted rows
+        if modified := self.__apply_rows(unread_rows):
+            logger.info(f"Components DB: {len(modified)} components modified by other instance")
+
+        snapshot_rows = [(component.name, component.hidden, component.aliases) for component in self.__components]
+        with self.__generation_lock:
+            generation = self.generation
+        # not a daemon: the application exit waits until the compaction is complete
+        self.__compaction = threading.Thread(target=self.__compact,
+                                             args=(journal_rows, snapshot_rows, os.path.dirname(self.db_file_path),
+                                                   generation))
+        self.__compaction.start()
+
+    def __compact(self, journal_rows: list[tuple[str, bool, str]], snapshot_rows: list[tuple[str, bool, str]],
+                  db_folder: str, generation: int):
+        logger.info(f"Compacting {len(journal_rows)} journal entries")
+        try:
+            if journal_rows:
+                # another instance may have compacted in the meantime: its rows are not in our snapshot
+                if not (result := self.__store.write(journal_rows, generation)):
+                    # the moved-aside journal is kept: replayed by sync() and compacted the next time
+                    logger.warning("Compaction aborted: the components DB was compacted by other instance")
+                    return
+                with self.__generation_lock:
+                    # sync() may have already seen a newer generation
+                    self.generation = max(self.generation, result[0])
+                    self.db_date = result[1]
+            self.__save_snapshot_rows(db_folder, snapshot_rows)
+            self.__journal.end_compaction()
+        except Exception as e:
+            # the journal is kept aside and will be replayed on the next load
+            logger.error(f"Error compacting the journal: {e}")
+
+    def wait_compaction(self):
+        """Blocks until the background compaction is finished"""
+        if self.__compaction:
+            self.__compaction.join()
 
     def _iterate_reader(self, csv_file):
         reader = csv.reader(csv_file, delimiter="\t")
@@ -262,54 +593,166 @@ class ComponentsDB:
                                           hidden=hidd,
                                           aliases=al))
 
-    def _load_csv(self, path: str):
-        try:
-            f = open(path, "r", encoding="utf-8")
-            self._iterate_reader(f)
-        except Exception as e:
-            logger.warning(f"  Not an UTF-8 encoding - opening in legacy ANSI mode")
-            # for backward-compatibility, to open older DB file not saved as UTF-8
-            f = open(path, "r", encoding="ansi")
-            self._iterate_reader(f)
-
-    def add_new(self, new_components: list[Component]) -> int:
-        """Iterate over new_items to add components not existing in current db"""
-        components_set = set(component.name for component in self.__components)
-        added = 0
-
-        for new_component in new_components:
-            if not new_component.name in components_set:
-                self.__components.append(new_component)
-                logger.debug(f"  + {new_component.name}")
-                added += 1
-
-        return added
-
-    def _save_csv(self, db_file_path: str):
-        with open(db_file_path, "w", encoding="utf-8") as f:
-            for component in self.__components:
-                hidden="x" if component.hidden else "_"
-                f.write(f"\"{component.name}\"\t{hidden}\t\"{component.aliases}\"\n")
+    def merge_scan(self, components_dict: dict[str, set[str]]) -> MergeReport:
+        """
+        Add the scanned components missing in the DB, logging them in the journal at once.
+        The components added by the user are never removed.
 
-    def save_new(self, db_folder: str):
-        """Save local DB to a CSV file with date-time"""
-        self.__components.sort()
+        :components_dict: scanner results, lower-case name : set of name variants
+        """
+        scanned_names = set()
+        for names in components_dict.values():
+            scanned_names.update(names)
+        db_names = set(component.name for component in self.__components)
+
+        report = MergeReport()
+        report.added = natsort.natsorted(scanned_names - db_names)
+        report.unchanged = len(scanned_names) - len(report.added)
+        # only counted: the names are not reported
+        report.not_scanned = len(db_names) - report.unchanged
+
+        new_components = [Component(name=name) for name in report.added]
+        for component in new_components:
+            self.__mark_changed(component)
+        self.__insert(new_components)
+        self.__write_journal()
+        return report
+
+    def _save_csv(self, db_file_path: str, rows: list[tuple[str, bool, str]]) -> str:
+        """Returns the checksum of the saved file"""
+        lines = []
+        for (name, hidden, aliases) in rows:
+            hidden="x" if hidden else "_"
+            lines.append(f"\"{name}\"\t{hidden}\t\"{aliases}\"\n")
+        content = "".join(lines).encode("utf-8")
+        with open(db_file_path, "wb") as f:
+            f.write(content)
+        return hashlib.sha256(content).hexdigest()
+
+    def __save_snapshot_rows(self, db_folder: str, rows: list[tuple[str, bool, str]]):
         now = time.strftime(self.FILENAME_DATE_FMT)
-        db_file_path = os.path.join(db_folder, f"components__{now}.csv")
-        try:
-            self._save_csv(db_file_path)
-            self.db_file_path = db_file_path
-        except Exception as e:
-            logger.error(f"Error saving to file '{db_file_path}: {e}'")
+        db_fname = f"components__{now}.csv"
+        checksum = self._save_csv(os.path.join(db_folder, db_fname), rows)
+
+        if self.__manifest is None:
+            self.__manifest = SnapshotsManifest(db_folder)
+        # re-read: the snapshots may have been written by the other instances
+        self.__manifest.load()
+        self.__manifest.record(db_fname, len(rows), checksum, self.generation)
+        self.__manifest.apply_retention(self.SNAPSHOTS_KEEP)
+
+    def save_new(self, db_folder: str):
+        """Save local DB to the store located in the db_folder"""
+        if self.__store is None:
+            self.__store = ComponentsStore(db_folder)
+            self.db_file_path = self.__store.path
+            self.__journal = ComponentsJournal(db_folder)
+            # new store: all components have to be written
+            try:
+                self.__write_store(self.__components)
+                self.__changed.clear()
+                self.dirty = False
+            except Exception as e:
+                logger.error(f"Error saving to file '{self.db_file_path}: {e}'")
+                return
+        self.save_changes()
 
     def save_changes(self):
-        """Save local DB to the same file"""
-        self.__components.sort()
-        try:
-            self._save_csv(self.db_file_path)
-            self.dirty = False
-        except Exception as e:
-            logger.error(f"Error saving changes to file '{self.db_file_path}: {e}'")
+        """Log modified components in the journal; compact the journal once it grows too much"""
+        if self.__journal is None:
+            if self.__changed:
+                logger.error("Components store not initialized")
+            return
+
+        self.__write_journal()
+        if self.__journal.count > self.JOURNAL_COMPACTION_THRESHOLD:
+            self.__start_compaction()
+
+    def update_component(self, component: Component, hidden: bool, aliases: str) -> bool:
+        """Modify the component attributes and log it in the journal; returns True if anything has changed"""
+        if component.hidden == hidden and component.aliases == aliases:
+            return False
+        component.hidden = hidden
+        self.__set_aliases(component, aliases)
+        self.__mark_changed(component)
+        self.__write_journal()
+        return True
+
+    def arranged_candidates(self, mru_filter: str, needle: str = None) -> list[str]:
+        """
+        Returns names of the visible components matching the needle (by default: the mru_filter),
+        with the MRU items of the mru_filter at the top.
+        The result is cached until the DB or the MRU of that filter are modified; it must not be modified.
+        """
+        if needle is None:
+            needle = mru_filter
+        key = (mru_filter.strip(), needle)
+
+        revision = self.mru_items.revision(mru_filter)
+        if (cached := self.__candidates.get(key)) and cached[0] == revision:
+            return cached[1]
+
+        names = list(self.filtered_names(needle))
+        self.mru_items.arrange(mru_filter, names)
+        # arrange() may add an empty MRU for a new filter
+        self.__candidates[key] = (self.mru_items.revision(mru_filter), names)
+        return names
+
+    def filtered_names(self, needle: str) -> list[str]:
+        """
+        Returns names of the visible components matching the needle, in the natural order.
+        The result is cached until the DB is modified; it must not be modified.
+        """
+        if (names := self.__filtered.get(needle)) is None:
+            names = [component.name for component in self.components_filtered(needle)]
+            self.__filtered[needle] = names
+        return names
+
+    def revision(self) -> str:
+        """
+        Returns the identifier of the DB content, the same in every session as long as the DB is not modified;
+        empty if the DB is not stored or has unsaved modifications
+        """
+        if self.__journal is None or self.dirty:
+            return ""
+        # the journal position grows with every modification, also during and after an aborted compaction
+        if not (position := self.__journal.position()):
+            return ""
+        return f"{os.path.normcase(os.path.abspath(self.db_file_path))}|{self.generation}|{position}"
+
+    def name_ranker(self) -> NameRanker:
+        """Returns the fuzzy ranking of the visible components names"""
+        if self.__ranker is None:
+            self.__ranker = NameRanker(self.names_visible())
+        return self.__ranker
+
+    def find(self, name: str) -> Component:
+        """Returns the component with the given name, or None"""
+        return self.__find(name)
+
+    def find_visible(self, name: str) -> Component:
+        """Returns the visible component with the given name, or None"""
+        component = self.__find(name)
+        if component and not component.hidden:
+            return component
+        return None
+
+    def find_canonical(self, name: str) -> Component:
+        """Returns the visible component with the same canonical name ("0603_10K" -> "0603_10k0"), or None"""
+        if self.__canonical is None:
+            self.__canonical = {}
+            for component in self.__components:
+                if not component.hidden:
+                    # natural order: the first of the equivalent names wins
+                    self.__canonical.setdefault(value_canon.canonical_key(component.name), component)
+        return self.__canonical.get(value_canon.canonical_key(name))
+
+    def find_by_alias(self, alias: str) -> Component:
+        """Returns the visible component having the given alias (case insensitive), or None"""
+        component = self.__components_by_alias.get(alias.strip().casefold())
+        if component and not component.hidden:
+            return component
+        return None
 
     def count_visible(self) -> int:
         """Returns the number of valid components"""
@@ -339,12 +782,11 @@ class ComponentsDB:
         :return List
         """
         needle = '*' + '*'.join(needle.split(' ')) + '*'
-        result = []
-        for component in self.__components:
-            if show_hidden or not component.hidden:
-                if fnmatch.fnmatch(f"{component.name};{component.aliases}", needle):
-                    result.append(component)
-        return result
+        # compile once, instead of fnmatch() per component; normcase() keeps the fnmatch() case rules
+        match = re.compile(fnmatch.translate(os.path.normcase(needle))).match
+        normcase = os.path.normcase
+        return [component for component in self.__components
+                if (show_hidden or not component.hidden) and match(normcase(f"{component.name};{component.aliases}"))]
 
     def names_visible(self) -> list[str]:
         names_list = list(component.name for component in self.components_all() if not component.hidden)
@@ -360,6 +802,8 @@ class ComponentsDB:
         for component in self.__components:
             if component.name.lower() == component_name_lower:
                 return False
-        self.__components.append(Component(name=component_name))
-        self.dirty = True
+        component = Component(name=component_name)
+        self.__insert([component])
+        self.__mark_changed(component)
+        self.__write_journal()
         return True
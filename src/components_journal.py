@@ -0,0 +1,164 @@
+#
+# 2026-10-19
+#
+
+import csv
+import io
+import logger
+import os
+
+# -----------------------------------------------------------------------------
+
+class ComponentsJournal:
+    """
+    Append-only log of the components modifications, made between the store compactions.
+    Each line is a full (name, hidden, aliases) row, so replaying the journal in order
+    gives the latest state of every modified component.
+    """
+
+    FILE_NAME = "components.journal"
+    COMPACTING_SUFFIX = ".compacting"
+    MERGING_SUFFIX = ".merging"
+
+    def __init__(self, db_folder: str):
+        self.path = os.path.join(db_folder, self.FILE_NAME)
+        """full filepath"""
+        self.count = 0
+        """number of entries not yet compacted into the store"""
+        self.__offset = 0
+        """size of the journal already read, always at the line boundary"""
+        self.__file_id = None
+        """identity of the journal file the __offset refers to; None if no file was read yet"""
+        self.__compacting_size = 0
+        """size of the journal moved aside for the compaction"""
+        self.__ahead = False
+        """own rows are appended after the rows of other instances, not read yet"""
+
+    def append(self, rows: list[tuple[str, bool, str]]):
+        """Writes the rows to the end of the journal and flushes them to the disk"""
+        if not rows:
+            return
+
+        with open(self.path, "a", encoding="utf-8", newline="") as f:
+            st = os.fstat(f.fileno())
+            writer = csv.writer(f, delimiter="\t", lineterminator="\n")
+            writer.writerows((name, "x" if hidden else "_", aliases) for (name, hidden, aliases) in rows)
+            f.flush()
+            os.fsync(f.fileno())
+            if st.st_size == self.__offset and self.__file_id in (None, self.__identity(st)):
+                # nothing appended by other instances: skip own rows in read_new()
+                self.__offset = os.fstat(f.fileno()).st_size
+                self.__file_id = self.__identity(st)
+            else:
+                self.__ahead = True
+        self.count += len(rows)
+
+    def position(self) -> str:
+        """
+        Returns the position of the rows read, growing with every row written on top of the store generation;
+        empty if own rows were appended after the rows not read yet
+        """
+        if self.__ahead:
+            return ""
+        return f"{self.__compacting_size}.{self.__offset}"
+
+    def replay(self) -> list[tuple[str, bool, str]]:
+        """Returns rows of the unfinished compaction and the journal, in the order of writing"""
+        compacting_path = self.path + self.COMPACTING_SUFFIX
+        rows = self.__read(compacting_path)
+        self.__compacting_size = os.path.getsize(compacting_path) if rows else 0
+        self.__offset = 0
+        self.__file_id = None
+        rows.extend(self.__read_new() or [])
+        self.count = len(rows)
+        return rows
+
+    def read_new(self) -> list[tuple[str, bool, str]]:
+        """Returns rows appended (also by other instances) since the last replay() or read_new()"""
+        if (rows := self.__read_new()) is None:
+            # journal was moved aside by the compaction of other instance
+            return self.replay()
+        self.count += len(rows)
+        return rows
+
+    @staticmethod
+    def __identity(st: os.stat_result) -> tuple[int, int]:
+        return (st.st_dev, st.st_ino)
+
+    def __read_new(self, path: str = None) -> list[tuple[str, bool, str]]:
+        """
+        Returns complete rows of the journal (or the file it was moved to) after the __offset,
+        or None if the file is not the one the __offset refers to
+        """
+        try:
+            with open(path or self.path, "rb") as f:
+                st = os.fstat(f.fileno())
+                if st.st_size < self.__offset or self.__file_id not in (None, self.__identity(st)):
+                    return None
+                f.seek(self.__offset)
+                content = f.read()
+        except FileNotFoundError:
+            self.__offset = 0
+            self.__file_id = None
+            return []
+
+        # the last line may still be written
+        content = content[:content.rfind(b"\n") + 1]
+        self.__offset += len(content)
+        self.__file_id = self.__identity(st)
+        # own rows were appended before the end of the file
+        self.__ahead = False
+        return self.__parse(io.StringIO(content.decode("utf-8", errors="replace"), newline=""))
+
+    def begin_compaction(self) -> tuple[list[tuple[str, bool, str]], list[tuple[str, bool, str]]]:
+        """
+        Moves the journal aside, so the new entries go to a fresh file while the compaction is running.
+        Returns: [rows to be compacted, rows appended by other instances and not read yet]
+        """
+        compacting_path = self.path + self.COMPACTING_SUFFIX
+        unread = []
+        if os.path.isfile(self.path):
+            # leftover of an interrupted compaction: the journal is merged into it
+            merge = os.path.isfile(compacting_path)
+            moved_path = self.path + (self.MERGING_SUFFIX if merge else self.COMPACTING_SUFFIX)
+            # renamed, not copied: the rows appended from now on go to a new journal file
+            os.replace(self.path, moved_path)
+            if (unread := self.__read_new(moved_path)) is None:
+                # the __offset refers to the file compacted by other instance: all the rows are new
+                self.__offset = 0
+                self.__file_id = None
+                unread = self.__read_new(moved_path)
+            if merge:
+                with open(compacting_path, "ab") as dst, open(moved_path, "rb") as src:
+                    dst.write(src.read())
+                os.remove(moved_path)
+        # the next rows are read from the beginning of the new journal
+        self.__offset = 0
+        self.__file_id = None
+        self.count = 0
+        rows = self.__read(compacting_path)
+        self.__compacting_size = os.path.getsize(compacting_path) if rows else 0
+        return (rows, unread)
+
+    def end_compaction(self):
+        """Removes the compacted entries"""
+        compacting_path = self.path + self.COMPACTING_SUFFIX
+        if os.path.isfile(compacting_path):
+            os.remove(compacting_path)
+        self.__compacting_size = 0
+
+    @staticmethod
+    def __read(path: str) -> list[tuple[str, bool, str]]:
+        if os.path.isfile(path):
+            with open(path, "r", encoding="utf-8", errors="replace", newline="") as f:
+                return ComponentsJournal.__parse(f)
+        return []
+
+    @staticmethod
+    def __parse(text_file) -> list[tuple[str, bool, str]]:
+        rows = []
+        for row in csv.reader(text_file, delimiter="\t"):
+            # an incomplete line may be left after a crash
+            if len(row) == 3 and row[0] and row[1] in ("x", "_"):
+                rows.append((row[0], row[1] == "x", row[2]))
+        return rows
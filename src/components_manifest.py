@@ -0,0 +1,122 @@
+#
+# 2026-10-19
+#
+
+import json
+import logger
+import os
+import threading
+
+# -----------------------------------------------------------------------------
+
+class SnapshotsManifest:
+    """
+    Small JSON file pointing at the current components CSV snapshot
+    and listing the snapshots covered by the retention policy.
+    """
+
+    FILE_NAME = "components_manifest.json"
+    ARCHIVE_FOLDER = "archive"
+
+    def __init__(self, db_folder: str):
+        self.db_folder = db_folder
+        """folder with the snapshots"""
+        self.path = os.path.join(db_folder, self.FILE_NAME)
+        """full filepath"""
+        self.current = ""
+        """file name of the current snapshot"""
+        self.rows = 0
+        """number of rows in the current snapshot"""
+        self.checksum = ""
+        """SHA-256 of the current snapshot file"""
+        self.generation = 0
+        """store generation the current snapshot was taken at"""
+        self.snapshots: list[str] = []
+        """file names of all known snapshots, the newest first"""
+        self.__lock = threading.Lock()
+
+    def load(self) -> bool:
+        """Returns False if there is no valid manifest"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                content = json.load(f)
+            self.current = content["current"]
+            self.rows = int(content.get("rows", 0))
+            self.checksum = content.get("checksum", "")
+            self.generation = int(content.get("generation", 0))
+            self.snapshots = list(content.get("snapshots", [self.current]))
+            return bool(self.current)
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            logger.warning(f"Invalid manifest '{self.path}': {e}")
+            return False
+
+    def record(self, file_name: str, rows: int, checksum: str, generation: int):
+        """Makes the file_name the current snapshot and saves the manifest"""
+        with self.__lock:
+            self.current = file_name
+            self.rows = rows
+            self.checksum = checksum
+            self.generation = generation
+            if file_name in self.snapshots:
+                self.snapshots.remove(file_name)
+            self.snapshots.insert(0, file_name)
+            self.__save()
+
+    def adopt(self, file_names: list[str]):
+        """
+        Starts the manifest with the existing snapshots, the newest first, made before the manifest existed;
+        their rows count and checksum are not known
+        """
+        with self.__lock:
+            self.current = file_names[0]
+            self.rows = 0
+            self.checksum = ""
+            self.generation = 0
+            self.snapshots = list(file_names)
+            self.__save()
+
+    def apply_retention(self, keep: int, archive: bool = True):
+        """
+        Keeps the `keep` newest snapshots; the older are moved to the archive subfolder or removed.
+        Snapshots not listed in the manifest are left untouched.
+        """
+        with self.__lock:
+            if len(self.snapshots) <= keep:
+                return
+
+            archive_folder = os.path.join(self.db_folder, self.ARCHIVE_FOLDER)
+            expired = self.snapshots[keep:]
+            self.snapshots = self.snapshots[:keep]
+            self.__save()
+            logger.info(f"  {len(expired)} snapshots expired: {'archived in ' + archive_folder if archive else 'removed'}")
+
+            for file_name in expired:
+                path = os.path.join(self.db_folder, file_name)
+                try:
+                    if archive:
+                        os.makedirs(archive_folder, exist_ok=True)
+                        os.replace(path, os.path.join(archive_folder, file_name))
+                        logger.debug(f"  Snapshot archived: {file_name}")
+                    else:
+                        os.remove(path)
+                        logger.debug(f"  Snapshot removed: {file_name}")
+                except FileNotFoundError:
+                    pass
+                except Exception as e:
+                    logger.warning(f"Unable to expire the snapshot '{file_name}': {e}")
+
+    def __save(self):
+        content = {
+            "current": self.current,
+            "rows": self.rows,
+            "checksum": self.checksum,
+            "generation": self.generation,
+            "snapshots": self.snapshots,
+        }
+        # write the complete file aside, then swap: the manifest is never seen half-written
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(content, f, indent=2)
+        os.replace(tmp_path, self.path)
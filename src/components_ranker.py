@@ -0,0 +1,99 @@
+#
+# 2026-10-19
+#
+
+import array
+import bisect
+import heapq
+import math
+import re
+
+# -----------------------------------------------------------------------------
+
+class NameRanker:
+    """
+    Fuzzy ranking of the component names against a free text (eg. PnP footprint and comment).
+    Names are split into character trigrams once; the inverted index trigram -> names
+    allows to score only the names sharing at least one trigram with the query.
+    """
+
+    TOP_K = 25
+    """Default number of returned candidates"""
+    MAX_DF = 0.05
+    """Trigrams present in more than this fraction of names only rescore the best candidates"""
+    SHORTLIST_FACTOR = 10
+    """Number of candidates rescored with the common trigrams, relative to the top_k"""
+
+    __RE_SEPARATORS = re.compile(r"[^0-9a-z]+")
+
+    def __init__(self, names: list[str]):
+        self.names = names
+        """ranked names; the results are taken from this list"""
+        self.__postings: dict[str, array.array] = {}
+        """trigram : indexes of the names containing it"""
+        self.__norms = array.array("f")
+        """length normalization factor of every name"""
+
+        postings: dict[str, list[int]] = {}
+        for idx, name in enumerate(names):
+            grams = self.__trigrams(name)
+            self.__norms.append(1.0 / math.sqrt(len(grams)) if grams else 0.0)
+            for gram in grams:
+                if lst := postings.get(gram):
+                    lst.append(idx)
+                else:
+                    postings[gram] = [idx]
+
+        # compact storage: 4 bytes per entry instead of a Python int object
+        self.__postings = {gram: array.array("I", lst) for gram, lst in postings.items()}
+
+    @staticmethod
+    def __trigrams(text: str) -> set[str]:
+        grams = set()
+        for token in NameRanker.__RE_SEPARATORS.split(text.casefold()):
+            if token:
+                # padding makes the token edges count
+                token = f" {token} "
+                grams.update(token[i:i+3] for i in range(len(token) - 2))
+        return grams
+
+    def rank(self, text: str, top_k: int = TOP_K) -> list[str]:
+        """Returns up to top_k names most similar to the text, the best first"""
+        n_names = len(self.names)
+        if n_names == 0:
+            return []
+
+        max_df = max(int(n_names * self.MAX_DF), 50)
+        scores: dict[int, float] = {}
+        common_postings = []
+        for gram in self.__trigrams(text):
+            postings = self.__postings.get(gram)
+            if not postings:
+                continue
+            # rare trigrams are more significant
+            weight = math.log(n_names / len(postings))
+            if len(postings) > max_df:
+                common_postings.append((postings, weight))
+                continue
+            for idx in postings:
+                scores[idx] = scores.get(idx, 0.0) + weight
+
+        norms = self.__norms
+        if common_postings:
+            if not scores:
+                # nothing specific in the text: start from the names sharing the least common trigram
+                scores = dict.fromkeys(min(common_postings, key=lambda entry: len(entry[0]))[0], 0.0)
+            else:
+                shortlist = heapq.nlargest(top_k * self.SHORTLIST_FACTOR, scores.items(),
+                                           key=lambda item: item[1] * norms[item[0]])
+                scores = dict(shortlist)
+
+            # postings are sorted: test the membership with a binary search
+            for idx in scores:
+                for (postings, weight) in common_postings:
+                    pos = bisect.bisect_left(postings, idx)
+                    if pos < len(postings) and postings[pos] == idx:
+                        scores[idx] += weight
+
+        best = heapq.nlargest(top_k, scores.items(), key=lambda item: item[1] * norms[item[0]])
+        return [self.names[idx] for (idx, _) in best]
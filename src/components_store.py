@@ -0,0 +1,114 @@
+#
+# 2026-10-19
+#
+
+import contextlib
+import logger
+import os
+import sqlite3
+import time
+
+# -----------------------------------------------------------------------------
+
+class ComponentsStore:
+    """
+    Components database kept in the SQLite file.
+    Every save is a single transaction, writing only the changed rows.
+    """
+
+    FILE_NAME = "components.sqlite3"
+    DATE_FMT = "%Y-%m-%d, %H:%M:%S"
+
+    def __init__(self, db_folder: str):
+        self.path = os.path.join(db_folder, self.FILE_NAME)
+        """full filepath"""
+        self.__schema_ready = False
+        """the tables were created (if missing) by this instance"""
+
+    def exists(self) -> bool:
+        return os.path.isfile(self.path)
+
+    @contextlib.contextmanager
+    def __connect(self, read_only: bool = True):
+        # short-lived connections: the store is used from the worker threads and may be on a network drive
+        if read_only:
+            con = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, timeout=10.0)
+        else:
+            con = sqlite3.connect(self.path, timeout=10.0)
+        try:
+            yield con
+        finally:
+            con.close()
+
+    @staticmethod
+    def __create_schema(con: sqlite3.Connection):
+        with con:
+            con.execute("CREATE TABLE IF NOT EXISTS components ("
+                        " name TEXT PRIMARY KEY,"
+                        " hidden INTEGER NOT NULL DEFAULT 0,"
+                        " aliases TEXT NOT NULL DEFAULT '',"
+                        " rev INTEGER NOT NULL DEFAULT 0"
+                        ") WITHOUT ROWID")
+            con.execute("CREATE INDEX IF NOT EXISTS components_rev ON components(rev)")
+            con.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+
+    @staticmethod
+    def __get_meta(con: sqlite3.Connection, key: str, default: str = "") -> str:
+        row = con.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    @staticmethod
+    def __set_meta(con: sqlite3.Connection, key: str, value: str):
+        con.execute("INSERT INTO meta(key, value) VALUES(?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET value = excluded.value", (key, value))
+
+    def load(self) -> tuple[int, str, list[tuple[str, bool, str]]]:
+        """Returns: [generation, date of the last modification, all (name, hidden, aliases) rows]"""
+        with self.__connect() as con:
+            generation = int(self.__get_meta(con, "generation", "0"))
+            updated = self.__get_meta(con, "updated", "?, ?")
+            rows = con.execute("SELECT name, hidden, aliases FROM components ORDER BY name").fetchall()
+        rows = [(name, hidden != 0, aliases) for (name, hidden, aliases) in rows]
+        return (generation, updated, rows)
+
+    def rows_since(self, generation: int) -> list[tuple[str, bool, str]]:
+        """Returns (name, hidden, aliases) rows written after the given generation"""
+        with self.__connect() as con:
+            rows = con.execute("SELECT name, hidden, aliases FROM components WHERE rev > ?", (generation,)).fetchall()
+        return [(name, hidden != 0, aliases) for (name, hidden, aliases) in rows]
+
+    def generation(self) -> int:
+        """Returns the number of commits made to the store"""
+        with self.__connect() as con:
+            return int(self.__get_meta(con, "generation", "0"))
+
+    def write(self, rows: list[tuple[str, bool, str]], expected_generation: int = None) -> tuple[int, str]:
+        """
+        Inserts new or updates existing (name, hidden, aliases) rows in a single transaction.
+        :expected_generation: if given, the rows are written only if the store is still at this generation
+        Returns: [new generation, date of the modification], or None if the generation has changed
+        """
+        updated = time.strftime(self.DATE_FMT)
+
+        with self.__connect(read_only=False) as con:
+            if not self.__schema_ready:
+                # once: the store may be created by this write
+                self.__create_schema(con)
+                self.__schema_ready = True
+            with con:
+                # lock the database before reading the generation, so the concurrent writers are serialized
+                con.execute("BEGIN IMMEDIATE")
+                generation = int(self.__get_meta(con, "generation", "0"))
+                if expected_generation is not None and generation != expected_generation:
+                    logger.debug(f"  Store: generation {generation}, {expected_generation} expected")
+                    return None
+                generation += 1
+                con.executemany("INSERT INTO components(name, hidden, aliases, rev) VALUES(?, ?, ?, ?) "
+                                "ON CONFLICT(name) DO UPDATE SET "
+                                " hidden = excluded.hidden, aliases = excluded.aliases, rev = excluded.rev",
+                                ((name, int(hidden), aliases, generation) for (name, hidden, aliases) in rows))
+                self.__set_meta(con, "generation", str(generation))
+                self.__set_meta(con, "updated", updated)
+
+        logger.debug(f"  Store: {len(rows)} rows written, generation {generation}")
+        return (generation, updated)
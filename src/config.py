@@ -1,7 +1,11 @@
 import configparser
+import io
 import os
 import logger
 
+from persistence import PersistScheduler
+from recent_projects import RecentProjects
+
 # -----------------------------------------------------------------------------
 
 # global config
@@ -30,6 +34,16 @@ class Config:
             except Exception as e:
                 logger.error(f"Cannot read the program configuration file: {e}")
 
+        if self.__config.has_section("recent"):
+            self.__migrate_recent()
+
+    def __migrate_recent(self):
+        """Move the [recent] section, growing with every opened file, to the RecentProjects"""
+        legacy_entries = {key: self.__parse_settings(value) for (key, value) in self.__config.items("recent", raw=True)}
+        RecentProjects.instance().import_legacy(legacy_entries)
+        self.__config.remove_section("recent")
+        self.save()
+
     def get_section(self, sect_name: str) -> configparser.SectionProxy:
         try:
             self.__config[sect_name]
@@ -38,11 +52,10 @@ class Config:
         return self.__config[sect_name]
 
     def save(self):
-        try:
-            with open(self.CONFIG_FILE_NAME, 'w', encoding="utf-8") as f:
-                self.__config.write(f)
-        except Exception as e:
-            logger.error(f"Cannot write the program configuration file: {e}")
+        """Schedule writing the configuration in the background"""
+        content = io.StringIO()
+        self.__config.write(content)
+        PersistScheduler.instance().schedule(self.CONFIG_FILE_NAME, content.getvalue())
 
     @property
     def editor_font_idx(self) -> int:
@@ -99,6 +112,16 @@ class Config:
     # def recent_board_bot_path(self, path: str):
     #     self.get_section("common")["recent_board_bot_path"] = path
 
+    @property
+    def pnp_regex(self) -> str:
+        pattern = self.get_section("common").get("pnp_regex", fallback="")
+        return pattern
+
+    @pnp_regex.setter
+    def pnp_regex(self, pattern: str):
+        # '%' is an interpolation character of the configparser
+        self.get_section("common")["pnp_regex"] = pattern.replace("%", "%%")
+
     @property
     def tou_directory_path(self) -> str:
         path = self.get_section("common").get("tou_directory_path", fallback="")
@@ -142,31 +165,35 @@ class Config:
                        pnp_columns: str, pnp2_path: str = ""):
         """Store a current project settings"""
         if pnp_path:
-            pnp_path_key = pnp_path.replace(" ", "_").replace(":", "")
-            sett = pnp_separator + "; " + str(pnp_first_row) + "; " + pnp_columns + "; " + pnp2_path + "; " + str(pnp_last_row)
-            self.get_section("recent")[pnp_path_key] = sett
+            RecentProjects.instance().put(pnp_path, {
+                "pnp_separator" : pnp_separator,
+                "pnp_first_row" : str(pnp_first_row),
+                "pnp_columns"   : pnp_columns,
+                "pnp2_path"     : pnp2_path,
+                "pnp_last_row"  : str(pnp_last_row)
+            })
 
     def read_settings(self, pnp_path: str) -> dict:
         """Load a recent project settings"""
         if pnp_path:
-            # FIXED: key saved implicitly to lower case - while reading, convert to lower case too
-            pnp_path = pnp_path.lower()
-            pnp_path_key = pnp_path.replace(" ", "_").replace(":", "")
-            recent_sett = self.get_section("recent").get(pnp_path_key, fallback="")
-            if recent_sett:
-                recent_sett = recent_sett.split(";")
-                # safety padding
-                while len(recent_sett) < 5:
-                    recent_sett.append("")
-
-                ret = {
-                    "pnp_separator" : recent_sett[0].strip(),
-                    "pnp_first_row" : recent_sett[1].strip(),
-                    "pnp_columns"   : recent_sett[2].strip(),
-                    "pnp2_path"     : recent_sett[3].strip(),
-                    "pnp_last_row"  : recent_sett[4].strip()
-                }
+            if settings := RecentProjects.instance().get(pnp_path):
+                ret = dict(settings)
                 ret["pnp_last_row"] = ret["pnp_last_row"] if ret["pnp_last_row"].isdigit() else "-1"
                 return ret
-            else:
-                return None
+        return None
+
+    @staticmethod
+    def __parse_settings(recent_sett: str) -> dict:
+        """Parse the value from the old [recent] section"""
+        recent_sett = recent_sett.split(";")
+        # safety padding
+        while len(recent_sett) < 5:
+            recent_sett.append("")
+
+        return {
+            "pnp_separator" : recent_sett[0].strip(),
+            "pnp_first_row" : recent_sett[1].strip(),
+            "pnp_columns"   : recent_sett[2].strip(),
+            "pnp2_path"     : recent_sett[3].strip(),
+            "pnp_last_row"  : recent_sett[4].strip()
+        }
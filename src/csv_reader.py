@@ -4,14 +4,33 @@
 
 import csv
 import logger
+import re
 
+import text_encoding
 from text_grid import TextGrid
 
 # -----------------------------------------------------------------------------
 
+FW_SAMPLE_ROWS = 255
+"""Number of lines used to detect the fixed-width columns; each histogram lane is a single byte"""
+
+FW_GAP_TOLERANCE = 0.02
+"""Fraction of sample lines allowed to occupy a column that is still considered as a gap"""
+
+MIN_COLUMNS = 4
+"""Rows with less cells are ignored"""
+
+# characters having a special meaning in the regular expression
+__RE_SPECIAL_CHARS = ".^$*+?{}[]\\|()"
+
+# maps every character to 1, except the whitespace which maps to 0
+__FW_OCCUPANCY_TABLE = bytes(0 if chr(c) in " \t\r\n" else 1 for c in range(256))
+
+# -----------------------------------------------------------------------------
+
 def __check_row_valid(row_cells: list[str]) -> bool:
     # ignore rows with empty cells 'A,B,C' or cell 'A' with a long horizontal line
-    row_valid = (len(row_cells) > 3) and (row_cells[0] or row_cells[1] or row_cells[2])
+    row_valid = (len(row_cells) >= MIN_COLUMNS) and (row_cells[0] or row_cells[1] or row_cells[2])
     row_valid = row_valid and not row_cells[0].startswith("___")
     return row_valid
 
@@ -46,6 +65,169 @@ def __read_sp(rows: list[str], tg: TextGrid):
         tg.rows_raw().append(row_cells_processed)
     return max_cols
 
+def __fw_detect_columns(sample: list[str]) -> list[tuple[int, int]]:
+    """
+    Returns a list of (start, end) character spans of the fixed-width columns,
+    found from the character-occupancy histogram of the sample lines
+    """
+    if not sample:
+        return []
+
+    width = max(len(line) for line in sample)
+    # each byte of the big integer is a separate counter (lane) of one character column;
+    # summing up to 255 lines of 0/1 bytes never overflows the lane, so the whole
+    # histogram is built with a few C-level operations per line
+    histogram = 0
+    for line in sample:
+        # non-ASCII characters are replaced with '?' so the byte offset == character offset
+        occupancy = line.encode("ascii", "replace").translate(__FW_OCCUPANCY_TABLE)
+        histogram += int.from_bytes(occupancy, "little")
+    counts = histogram.to_bytes(width, "little")
+
+    gap_limit = int(len(sample) * FW_GAP_TOLERANCE)
+    spans = []
+    start = None
+    for col, cnt in enumerate(counts):
+        if cnt > gap_limit:
+            if start is None:
+                start = col
+        elif start is not None:
+            spans.append((start, col))
+            start = None
+    if start is not None:
+        spans.append((start, width))
+    return spans
+
+def __read_fw(file, tg: TextGrid) -> int:
+    # collect the sample used for the columns detection, then stream the remaining lines
+    sample = []
+    for line in file:
+        if line.strip():
+            sample.append(line.rstrip("\r\n").expandtabs())
+            if len(sample) == FW_SAMPLE_ROWS:
+                break
+
+    spans = __fw_detect_columns(sample)
+    if not spans:
+        return 0
+
+    logger.debug(f"  Fixed-width columns: {spans}")
+    # the text starting before the first column or exceeding the last one
+    # is kept in the boundary columns
+    slices = [slice(start, end) for (start, end) in spans]
+    slices[0] = slice(None, spans[0][1])
+    slices[-1] = slice(spans[-1][0], None)
+
+    def append_row(row: str):
+        row_cells = [row[sl].strip() for sl in slices]
+        if __check_row_valid(row_cells):
+            tg.rows_raw().append(row_cells)
+
+    for row in sample:
+        append_row(row)
+    for line in file:
+        if line.strip():
+            append_row(line.rstrip("\r\n").expandtabs())
+    return len(slices)
+
+def __re_literal_prefix(pattern: str) -> tuple[str, bool]:
+    """
+    Returns the literal text every match must start with and the flag if the pattern is anchored;
+    eg. for "^PART (?P<id>\\w+)" returns ("PART ", True)
+    """
+    anchored = pattern.startswith("^")
+    idx = 1 if anchored else 0
+    prefix = ""
+
+    while idx < len(pattern):
+        ch = pattern[idx]
+        if ch == "\\":
+            # only escaped special characters are literals; \d, \w, ... are not
+            if idx + 1 < len(pattern) and pattern[idx + 1] in __RE_SPECIAL_CHARS + " -#&~":
+                ch = pattern[idx + 1]
+                idx += 1
+            else:
+                break
+        elif ch in __RE_SPECIAL_CHARS:
+            break
+        prefix += ch
+        idx += 1
+
+    # the last character is optional or repeated: 'AB*' -> 'A'
+    if prefix and idx < len(pattern) and pattern[idx] in "*?{":
+        prefix = prefix[:-1]
+
+    # top-level alternative 'AB|CD' makes the prefix useless
+    depth = 0
+    in_class = False
+    escaped = False
+    for ch in pattern:
+        if escaped:
+            escaped = False
+        elif ch == "\\":
+            escaped = True
+        elif in_class:
+            in_class = ch != "]"
+        elif ch == "[":
+            in_class = True
+        elif ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif ch == "|" and depth == 0:
+            return ("", False)
+
+    return (prefix, anchored)
+
+def compile_regex(pattern: str) -> tuple[re.Pattern, list[int], list[str]]:
+    """
+    Returns the compiled pattern of the '*re' delimiter, ids and names of its groups, that are the columns.
+    Raises ValueError describing the invalid pattern.
+    """
+    if not pattern:
+        raise ValueError("regular expression not provided")
+
+    try:
+        regex = re.compile(pattern)
+    except re.error as e:
+        raise ValueError(f"invalid regular expression: {e}") from e
+
+    # named groups in order of appearance; otherwise all groups
+    if regex.groupindex:
+        group_ids = sorted(regex.groupindex.values())
+        group_names = sorted(regex.groupindex, key=regex.groupindex.get)
+    else:
+        group_ids = list(range(1, regex.groups + 1))
+        group_names = [f"group{g}" for g in group_ids]
+
+    if len(group_ids) < MIN_COLUMNS:
+        # the rows would be ignored as invalid
+        raise ValueError(f"regular expression has {len(group_ids)} groups, at least {MIN_COLUMNS} are required")
+    return (regex, group_ids, group_names)
+
+def __read_re(file, tg: TextGrid, pattern: str) -> int:
+    (regex, group_ids, group_names) = compile_regex(pattern)
+    (prefix, anchored) = __re_literal_prefix(pattern)
+    logger.debug(f"  Regex groups: {group_names}, literal prefix: '{prefix}'")
+    # column names as a first row
+    tg.rows_raw().append(group_names)
+
+    for line in file:
+        # cheap pre-filter, skipping the lines that cannot match at all
+        if prefix:
+            if anchored:
+                if not line.startswith(prefix):
+                    continue
+            elif prefix not in line:
+                continue
+
+        if m := regex.search(line):
+            row_cells = [(m.group(g) or "").strip() for g in group_ids]
+            if __check_row_valid(row_cells):
+                tg.rows_raw().append(row_cells)
+
+    return len(group_ids)
+
 def __read_csv(file, tg: TextGrid, delim: str, quote_char: str = '"'):
     max_cols = 0
     reader = csv.reader(file, delimiter=delim, quotechar=quote_char)
@@ -73,32 +255,34 @@ def __read_csv(file, tg: TextGrid, delim: str, quote_char: str = '"'):
 
     return max_cols
 
-def read_csv(path: str, delim: str) -> TextGrid:
+def read_csv(path: str, delim: str, pattern: str = "") -> TextGrid:
     """
     Reads entire CSV/text file.
 
     Delim may be: ' '  ','  ';'  '\t'  '*fw'  '*re'
+
+    Pattern is a regular expression with named groups, used for the '*re' delimiter
     """
 
     assert path is not None
     assert isinstance(delim, str)
     logger.info(f"Reading file '{path}', delim='{delim}'")
-    tg = TextGrid()
-    max_cols = 0
 
-    with open(path, "r", encoding="utf-8") as f:
+    def read(f) -> tuple[TextGrid, int]:
+        # may be called again, if the file has to be re-read with another encoding
+        tg = TextGrid()
         if delim == "*sp":
             rows = f.read().splitlines()
             max_cols = __read_sp(rows, tg)
         elif delim == "*fw":
-            # TODO: add reader for fixed-width
-            raise ValueError("delimiter *fw not yet implemented")
+            max_cols = __read_fw(f, tg)
         elif delim == "*re":
-            # TODO: add reader for reg-ex
-            raise ValueError("delimiter *re not yet implemented")
+            max_cols = __read_re(f, tg, pattern)
         else:
             max_cols = __read_csv(f, tg, delim)
+        return (tg, max_cols)
 
+    (tg, max_cols) = text_encoding.read_file(path, read)
     tg.nrows = len(tg.rows_raw())
     tg.ncols = max_cols
     tg.align_number_of_columns()
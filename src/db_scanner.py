@@ -10,7 +10,6 @@ import natsort
 import ui_helpers
 from tou_reader import TouFile
 from devlib_reader import DevLibFile
-from components import ComponentsDB
 from config import Config
 
 # -----------------------------------------------------------------------------
@@ -22,14 +21,15 @@ class DbScanner(customtkinter.CTkToplevel):
     def __init__(self, *args, **kwargs):
         """
         app=main wnd, so we know how to center the popup
-        callback=typing.Callable[[str, ComponentDB], None] - function receiving "y", "n", "o", "c"
+        callback=typing.Callable[[str, str, dict[str, set[str]]], None] - function receiving "o" or "c", input_type
+                 and the scanned components
         input_type: str = ("tou", "devlib")
         """
         assert "app" in kwargs
         app = kwargs.pop("app")
 
         assert "callback" in kwargs
-        self.callback: typing.Callable[[str, ComponentsDB], None] = kwargs.pop("callback")
+        self.callback: typing.Callable[[str, str, dict[str, set[str]]], None] = kwargs.pop("callback")
 
         assert "input_type" in kwargs
         self.input_type = kwargs.pop("input_type")
@@ -126,9 +126,8 @@ class DbScanner(customtkinter.CTkToplevel):
         logger.debug("Ok")
 
         if self.components_dict:
-            # make DB from self.components_dict
-            components = ComponentsDB(components_dict=self.components_dict)
-            self.callback("o", self.input_type, components)
+            # the raw results are merged directly into the working DB
+            self.callback("o", self.input_type, self.components_dict)
         else:
             self.callback("c", self.input_type, None)
         self.destroy()
@@ -265,8 +264,7 @@ class DbScanner(customtkinter.CTkToplevel):
 
         logger.debug("Prepare report")
         components_report = ""
-        components_keys_sorted = list(self.components_dict)
-        components_keys_sorted.sort()
+        components_keys_sorted = natsort.natsorted(self.components_dict)
 
         for i, component_key in enumerate(components_keys_sorted):
             components_str = f"{self.components_dict[component_key]}".strip("{}")
@@ -281,15 +279,18 @@ class DbScanner(customtkinter.CTkToplevel):
             devlib_path = self.entry_lib_path.get()
             devlib = DevLibFile(devlib_path)
             self.btn_ok.configure(state=tkinter.NORMAL)
-            self.devlib_scan_report(devlib)
-            self.devlib_components_report(devlib)
+            try:
+                self.devlib_scan_report(devlib)
+                self.devlib_components_report(devlib)
+            finally:
+                devlib.close()
         except Exception as e:
             logger.error(f"Error occured: {e}")
         finally:
             self.btn_scan.configure(state=tkinter.NORMAL)
 
     def devlib_scan_report(self, devlib: DevLibFile):
-        devlib_report = f"{devlib.file_name} | {len(devlib.items)} components\n"
+        devlib_report = f"{devlib.file_name} | {devlib.count_components()} components\n"
         self.textbox_scanresult.insert("0.0", devlib_report)
 
     def devlib_components_report(self, devlib: DevLibFile):
@@ -305,8 +306,7 @@ class DbScanner(customtkinter.CTkToplevel):
 
         logger.debug("Prepare report")
         components_report = ""
-        components_keys_sorted = list(self.components_dict)
-        components_keys_sorted.sort()
+        components_keys_sorted = natsort.natsorted(self.components_dict)
 
         for i, component_key in enumerate(components_keys_sorted):
             components_str = f"{self.components_dict[component_key]}".strip("{}")
@@ -1,11 +1,14 @@
 import logger
+import mmap
 import os
 
+import text_encoding
+
 # -----------------------------------------------------------------------------
 
 """
 The DevLibEd.Lib file consists a number of DEVLIB_COMPONENT_SIZE bytes long records,
-each starting with the 82 bytes long component name.
+each starting with the 82 bytes long component name, followed by the 44 bytes long base name.
 
 The DevLibEd2.Lib consists a number of DEVLIB2_COMPONENT_SIZE bytes long records.
 """
@@ -17,81 +20,158 @@ DEVLIB2_COMPONENT_SIZE = 2048
 DEVLIB_COMPONENT_NAME_SIZE = 82
 DEVLIB_COMPONENT_BASENAME_SIZE = 44
 
+class DevLibRecord:
+    """Location of a component record in the library; the fields are decoded on demand"""
+
+    __slots__ = ("offset", "name_hash")
+
+    def __init__(self, offset: int, name_hash: int):
+        self.offset = offset
+        """record offset in the file"""
+        self.name_hash = name_hash
+        """hash of the name key, see DevLibFile.name_key()"""
+
 class DevLibFile:
     def __init__(self, path: str):
+        self.file_path = path
+        """.Lib file path"""
         self.file_name = os.path.basename(path)
         """.Lib filename"""
-        # self.items: dict[str, list[(str, str)]] = {}
-        self.items: dict[str, list[str]] = {}
-        """dictionary with lower-case component name : list of component names"""
-        if not self.__scan(path, True):
-            self.items.clear()
-            self.__scan(path, False)
-
-    def __scan(self, path: str, lib_v1: bool) -> bool:
+        self.component_size = 0
+        """size of the record, depending on the library version"""
+        self.encoding = "utf-8"
+        """encoding of the names"""
+        self.records: list[DevLibRecord] = []
+        """index of all components records"""
+        self.__records_by_hash: dict[int, list[DevLibRecord]] = {}
+        self.__items: dict[str, list[str]] = None
+        self.__file = None
+        self.__mm: mmap.mmap = None
+        """the file mapping used by the record accessors, opened at first use"""
+
         with open(path, "rb") as f:
             header_bytes = f.read(len(DEVLIB_HEADER))
-            header_str = header_bytes.decode()
-            if header_str != DEVLIB_HEADER:
+            if header_bytes != DEVLIB_HEADER.encode():
                 logger.error(f"File '{path}' has no expected header")
-                return False
-
-            n = 0
-            component_size = DEVLIB_COMPONENT_SIZE if lib_v1 else DEVLIB2_COMPONENT_SIZE
-
-            while True:
-                f.seek(DEVLIB_OFFSET + (n * component_size), 0) # seek from the beginning
-                n += 1
-                name_bytes = f.read(DEVLIB_COMPONENT_NAME_SIZE)
-                # _base_bytes = f.read(DEVLIB_COMPONENT_BASENAME_SIZE)
-
-                if len(name_bytes) == DEVLIB_COMPONENT_NAME_SIZE:
-                    # "2512_R_7,5R/5%/1W(3)\x00\x00\x00\x00\x00\x00\x00" -> "2512_R_7,5R/5%/1W(3)"
-                    if name_bytes[0] == 0:
-                        # component name can't start with nul (it may if the file is Ed2.Lib)
-                        logger.warning(f"Component name starts with NULL - Ed2.Lib?")
-                        return False
-
-                    if (nul_idx := name_bytes.find(0)) >= 0:
-                        name_bytes = name_bytes[0:nul_idx]
-
-                    # if (nul_idx := base_bytes.find(0)) >= 0:
-                    #     base_bytes = base_bytes[0:nul_idx]
-
-                    if name_str := self.__decode_name(n, name_bytes):
-                        if name_str.endswith(")"):
-                            # "2512_R_7,5R/5%/1W(3)" -> "2512_R_7,5R/5%/1W"
-                            if (par_open_idx := name_str.rfind("(")) >= 0:
-                                name_str = name_str[0:par_open_idx]
-
-                        name_str = name_str.strip()
-
-                        if len(name_str):
-                            key = name_str.lower()
-                            if lst := self.items.get(key):
-                                # lst.append((name_str, base_str))
-                                lst.append(name_str)
-                            else:
-                                # self.items[key] = [(name_str, base_str)]
-                                self.items[key] = [name_str]
-                            logger.debug(f"    {n:3}. {name_str}")
+                return
+
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                self.component_size = self.__detect_component_size(mm)
+                self.__scan(mm)
+
+        logger.debug(f"  {len(self.records)} records indexed")
+
+    def close(self):
+        """Releases the file mapping of the record accessors"""
+        if self.__mm is not None:
+            self.__mm.close()
+            self.__file.close()
+            self.__mm = None
+            self.__file = None
+
+    @property
+    def items(self) -> dict[str, list[str]]:
+        """dictionary with the name key : list of component names; decoded at first use"""
+        if self.__items is None:
+            self.__items = {}
+            for record in self.records:
+                name_bytes = self.__name_field(self.read_field(record, 0, DEVLIB_COMPONENT_NAME_SIZE))
+                # the same key as the name_hash, so the items match the count_components()
+                key = name_bytes.lower().decode(self.encoding, errors="replace")
+                name_str = self.__decode_name(record.offset, name_bytes)
+                if lst := self.__items.get(key):
+                    lst.append(name_str)
                 else:
-                    break
-
-        return True
+                    self.__items[key] = [name_str]
+        return self.__items
+
+    def count_components(self) -> int:
+        """Returns the number of distinct component names, without decoding them"""
+        return len(self.__records_by_hash)
+
+    def find(self, name: str) -> list[DevLibRecord]:
+        """Returns records of the component with a given name, case insensitive"""
+        key = self.name_key(name.encode(self.encoding, errors="replace"))
+        candidates = self.__records_by_hash.get(hash(key), [])
+        # verify, as the hashes may collide
+        return [record for record in candidates
+                if self.name_key(self.read_field(record, 0, DEVLIB_COMPONENT_NAME_SIZE)) == key]
+
+    def read_field(self, record: DevLibRecord, field_offset: int, field_size: int) -> bytes:
+        """Returns raw bytes of the record field, up to the first NUL"""
+        if self.__mm is None:
+            self.__file = open(self.file_path, "rb")
+            self.__mm = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ)
+        start = record.offset + field_offset
+        return self.__mm[start : start + field_size].split(b"\x00", 1)[0]
+
+    def read_name(self, record: DevLibRecord) -> str:
+        name_bytes = self.read_field(record, 0, DEVLIB_COMPONENT_NAME_SIZE)
+        return self.__decode_name(record.offset, self.__name_field(name_bytes))
+
+    def read_basename(self, record: DevLibRecord) -> str:
+        base_bytes = self.read_field(record, DEVLIB_COMPONENT_NAME_SIZE, DEVLIB_COMPONENT_BASENAME_SIZE)
+        return self.__decode_name(record.offset, base_bytes.strip())
+
+    @staticmethod
+    def name_key(name_bytes: bytes) -> bytes:
+        """Case-insensitive key of the raw name field; folds the ASCII letters only, as it's not decoded"""
+        return DevLibFile.__name_field(name_bytes).lower()
+
+    @staticmethod
+    def __records_range(mm: mmap.mmap, component_size: int) -> range:
+        """Returns offsets of all records having a complete name field"""
+        return range(DEVLIB_OFFSET, len(mm) - DEVLIB_COMPONENT_NAME_SIZE + 1, component_size)
+
+    @staticmethod
+    def __name_field(name_bytes: bytes) -> bytes:
+        # "2512_R_7,5R/5%/1W(3)\x00\x00\x00\x00\x00\x00\x00" -> "2512_R_7,5R/5%/1W(3)"
+        name_bytes = name_bytes.split(b"\x00", 1)[0]
+        if name_bytes.endswith(b")"):
+            # "2512_R_7,5R/5%/1W(3)" -> "2512_R_7,5R/5%/1W"
+            if (par_open_idx := name_bytes.rfind(b"(")) >= 0:
+                name_bytes = name_bytes[0:par_open_idx]
+        return name_bytes.strip()
+
+    def __detect_component_size(self, mm: mmap.mmap) -> int:
+        # component name can't start with nul, but it does if the v1 offsets are used to read Ed2.Lib:
+        # probe the first byte of every v1 record with a single strided slice
+        offsets = self.__records_range(mm, DEVLIB_COMPONENT_SIZE)
+        if not offsets:
+            return DEVLIB_COMPONENT_SIZE
+
+        names_first_bytes = mm[offsets.start : offsets[-1] + 1 : DEVLIB_COMPONENT_SIZE]
+        if 0 in names_first_bytes:
+            logger.debug("  Component name starts with NULL - Ed2.Lib")
+            return DEVLIB2_COMPONENT_SIZE
+        return DEVLIB_COMPONENT_SIZE
+
+    def __scan(self, mm: mmap.mmap):
+        """Builds the records index: only the offset and the name hash, without decoding"""
+        sample = bytearray()
+
+        for ofs in self.__records_range(mm, self.component_size):
+            key = self.name_key(mm[ofs : ofs + DEVLIB_COMPONENT_NAME_SIZE])
+            if not key:
+                continue
+
+            record = DevLibRecord(ofs, hash(key))
+            self.records.append(record)
+            if lst := self.__records_by_hash.get(record.name_hash):
+                lst.append(record)
+            else:
+                self.__records_by_hash[record.name_hash] = [record]
+
+            if len(sample) < text_encoding.SAMPLE_SIZE:
+                sample += key + b"\n"
+
+        # choose the codec once, using the names from the beginning of the library
+        self.encoding = text_encoding.detect_bytes(bytes(sample), len(sample) < text_encoding.SAMPLE_SIZE)
+        logger.debug(f"  Names encoding: {self.encoding}")
 
     def __decode_name(self, idx: int, input: bytes) -> str:
-        try:
-            # name_str = name_bytes.decode(encoding="utf-8", errors="replace")
-            name_str = input.decode(encoding="utf-8", errors="strict")
-            return name_str
-        except Exception as e:
-            try:
-                name_str = input.decode(encoding="ansi", errors="strict")
-                name_bytes = name_str.encode(encoding="utf-8")
-                name_str = name_bytes.decode(encoding="utf-8", errors="replace")
-                return name_str
-            except Exception as e:
-                logger.warning(f"    Entry '{idx}' contains invalid characters: {e}")
-                logger.warning(f"    {input}")
-        return None
+        name_str = input.decode(encoding=self.encoding, errors="replace")
+        if "\ufffd" in name_str:
+            logger.warning(f"    Entry '{idx}' contains invalid characters")
+            logger.warning(f"    {input}")
+        return name_str
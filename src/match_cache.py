@@ -0,0 +1,76 @@
+#
+# 2026-10-19
+#
+
+import collections
+import json
+import logger
+import os
+
+from components import ComponentsDB
+from persistence import PersistScheduler
+
+# -----------------------------------------------------------------------------
+
+class MatchCache:
+    """
+    Results of matching the PnP footprint+comment against the components DB, kept between the sessions.
+    The results are valid only for the DB revision they were computed for.
+    """
+
+    FILE_NAME = "yedytor_match_cache.json"
+    VERSION = 3
+    """incremented when the matching rules change"""
+    MAX_ENTRIES = 20000
+
+    def __init__(self, components: ComponentsDB):
+        self.db_revision = components.revision()
+        """DB revision of the results; empty if the cache is disabled"""
+        self.__entries: collections.OrderedDict[str, list] = collections.OrderedDict()
+        """footprint|comment : [marker, selection, needle]; the most recently used at the end"""
+        self.__modified = False
+
+        if self.db_revision and os.path.isfile(self.FILE_NAME):
+            try:
+                with open(self.FILE_NAME, "r", encoding="utf-8") as f:
+                    content = json.load(f)
+                if content.get("version") == self.VERSION and content.get("db_revision") == self.db_revision:
+                    for (key, entry) in content["entries"]:
+                        self.__entries[key] = entry
+                    logger.debug(f"  Match cache: {len(self.__entries)} entries")
+                else:
+                    logger.debug("  Match cache: outdated, discarded")
+            except Exception as e:
+                logger.error(f"Cannot read the match cache: {e}")
+                self.__entries.clear()
+
+    def get(self, key: str) -> list:
+        """Returns [marker, selection, needle] or None"""
+        if entry := self.__entries.get(key):
+            self.__entries.move_to_end(key)
+        return entry
+
+    def put(self, key: str, marker: str, selection: str, needle: str):
+        """
+        :needle: filter of the FILTER/NOMATCH rows, case preserved;
+                 the proposition lists are not stored, but recomputed from the DB
+        """
+        if self.db_revision:
+            self.__entries[key] = [marker, selection, needle]
+            self.__entries.move_to_end(key)
+            self.__modified = True
+
+    def save(self):
+        if not self.__modified:
+            return
+
+        while len(self.__entries) > self.MAX_ENTRIES:
+            self.__entries.popitem(last=False)
+
+        content = {
+            "version": self.VERSION,
+            "db_revision": self.db_revision,
+            "entries": list(self.__entries.items()),
+        }
+        PersistScheduler.instance().schedule(self.FILE_NAME, json.dumps(content))
+        self.__modified = False
@@ -0,0 +1,83 @@
+#
+# 2026-10-19
+#
+
+import logger
+import os
+import threading
+import time
+
+# -----------------------------------------------------------------------------
+
+def write_atomic(path: str, content: str):
+    """Writes the complete file aside, then swaps it: the file is never seen half-written"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(content)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+# -----------------------------------------------------------------------------
+
+class PersistScheduler:
+    """
+    Singleton writing the small files (config, MRU) in the background.
+    Subsequent saves of the same file are coalesced; the file is written
+    after a quiet period, with the content captured at the time of the save.
+    """
+
+    QUIET_PERIOD = 1.0
+    """Seconds without new saves before writing"""
+    _instance = None
+
+    @staticmethod
+    def instance():
+        """Returns singleton object"""
+        if PersistScheduler._instance is None:
+            PersistScheduler._instance = PersistScheduler()
+        return PersistScheduler._instance
+
+    def __init__(self):
+        self.__pending: dict[str, str] = {}
+        """path : content"""
+        self.__deadline = 0.0
+        self.__cond = threading.Condition()
+        # keeps the writes in order of taking the pending content
+        self.__write_lock = threading.Lock()
+        self.__thread: threading.Thread = None
+
+    def schedule(self, path: str, content: str):
+        """Write the content to the path after the quiet period"""
+        with self.__cond:
+            self.__pending[path] = content
+            self.__deadline = time.monotonic() + self.QUIET_PERIOD
+            if self.__thread is None:
+                # daemon: the application calls flush() before exit
+                self.__thread = threading.Thread(target=self.__run, name="persist", daemon=True)
+                self.__thread.start()
+            self.__cond.notify()
+
+    def flush(self):
+        """Write all pending files now"""
+        self.__write_pending()
+
+    def __run(self):
+        while True:
+            with self.__cond:
+                while not self.__pending:
+                    self.__cond.wait()
+                while (remaining := self.__deadline - time.monotonic()) > 0:
+                    self.__cond.wait(remaining)
+            self.__write_pending()
+
+    def __write_pending(self):
+        with self.__write_lock:
+            with self.__cond:
+                (pending, self.__pending) = (self.__pending, {})
+
+            for (path, content) in pending.items():
+                try:
+                    write_atomic(path, content)
+                except Exception as e:
+                    logger.error(f"Cannot write the file '{path}': {e}")
@@ -3,11 +3,15 @@ import json
 import logger
 import multiprocessing
 import re
+import threading
 import typing
 import fnmatch
+import value_canon
 
 from components import ComponentsDB
+from match_cache import MatchCache
 from project import Project
+from reference_index import ReferenceIndex
 
 # -----------------------------------------------------------------------------
 
@@ -72,6 +76,8 @@ class Marker:
         return self.__is_set
 
 class RefItem:
+    __slots__ = ("footprint", "comment", "descr", "selection")
+
     def __init__(self):
         self.footprint = ""
         self.comment = ""
@@ -80,31 +86,35 @@ class RefItem:
 
 class RefItems:
     def __init__(self):
-        self.__items : list[RefItem] = []
-        # this map will help faster matching footprint+comment -> component
-        self.__footprints : dict[str, set[RefItem]] = {}
+        self.__count = 0
+        # footprint+comment -> component, the first selection wins
+        self.__items : dict[tuple[str, str], RefItem] = {}
+        # footprint+comment -> other selections found for it
+        self.__conflicts : dict[tuple[str, str], set[str]] = {}
 
     def append(self, item : RefItem):
-        self.__items.append(item)
+        self.__count += 1
+        key = (item.footprint, item.comment)
+        if (known := self.__items.get(key)) is None:
+            self.__items[key] = item
+        elif known.selection != item.selection:
+            self.__conflicts.setdefault(key, set()).add(item.selection)
 
     def count(self) -> int:
-        return len(self.__items)
+        return self.__count
+
+    def conflicts(self) -> dict[tuple[str, str], set[str]]:
+        """Returns the footprint+comment : selections other than the one used"""
+        return self.__conflicts
 
     def prepare(self):
-        self.__footprints = {}
-        #  create map of footprint : {items}
-        for item in self.__items:
-            if entry := self.__footprints.get(item.footprint):
-                entry.add(item)
-            else:
-                self.__footprints[item.footprint] = {item}
-        # logger.debug(f"  __footprints.len = {len(self.__footprints)}")
+        for (key, selections) in self.__conflicts.items():
+            logger.warning(f"  Reference {key[0]}|{key[1]}: '{self.__items[key].selection}' used, "
+                           f"also selected: {', '.join(sorted(selections))}")
 
     def find(self, footprint: str, comment: str) -> str:
-        if entry := self.__footprints.get(footprint):
-            for item in entry:
-                if item.comment == comment:
-                    return item.selection
+        if item := self.__items.get((footprint, comment)):
+            return item.selection
         return None
 
 # -----------------------------------------------------------------------------
@@ -355,13 +365,22 @@ class ItemsIterator:
 # -----------------------------------------------------------------------------
 
 def prepare_editor_data(components: ComponentsDB, project: Project, wip_items: list[dict] = None,
-                        reference: RefItems = None) -> PnPEditorData:
+                        reference: RefItems = None, history: ReferenceIndex = None,
+                        out: PnPEditorData = None, cancel: threading.Event = None) -> PnPEditorData:
+    """
+    Matches the project or WiP items with the components.
+    :out: filled item by item, so another thread can display the items already matched
+    :cancel: when set, the remaining items are added without matching
+    If matching of an item fails, it and the remaining items are added as NOMATCH.
+    """
     # works well with `wip_items`, hangs the app for `project`:
     USE_MULTIPROCESS = False
 
     items_iterator = ItemsIterator(project, wip_items)
     names_visible = components.names_visible()
-    out = PnPEditorData()
+    match_cache = MatchCache(components)
+    if out is None:
+        out = PnPEditorData()
 
     if USE_MULTIPROCESS:
         # processes=1 -> 26s
@@ -370,7 +389,8 @@ def prepare_editor_data(components: ComponentsDB, project: Project, wip_items: l
         # https://stackoverflow.com/questions/40283772/python-3-why-does-only-functions-and-partials-work-in-multiprocessing-apply-asy
         cache = dict()
         process_fn = functools.partial(__process_pnpitem,
-                                       components=components, names_visible=names_visible, cache=cache, reference=reference)
+                                       components=components, names_visible=names_visible, cache=cache,
+                                       match_cache=None, reference=reference, history=history)
 
         # https://docs.python.org/3/library/multiprocessing.html#module-multiprocessing.pool
         with multiprocessing.Pool(processes=4) as pool:
@@ -383,15 +403,36 @@ def prepare_editor_data(components: ComponentsDB, project: Project, wip_items: l
     else:
         # single thread: 24s
         cache = dict()
+        failed = False
         for pnpitem in items_iterator:
-            __process_pnpitem(pnpitem, components, names_visible, cache, reference)
-            out.items_filtered().append(pnpitem)
+            cancelled = cancel and cancel.is_set()
+            if not (failed or cancelled):
+                try:
+                    __process_pnpitem(pnpitem, components, names_visible, cache, match_cache, reference, history)
+                except Exception as e:
+                    logger.error(f"Matching failed at item {pnpitem.id}: {e}; the remaining items are not matched")
+                    failed = True
+
+            if failed:
+                # keep the WiP selections, the rest are left for the user to configure
+                if not pnpitem.marker.is_set() or pnpitem.marker.value == Marker.FILTER:
+                    pnpitem.marker.value = Marker.NOMATCH
+                pnpitem.editor_filter = pnpitem.editor_selection
+                pnpitem.editor_cbx_items = names_visible
+            elif cancelled:
+                # left for the user to configure
+                pnpitem.editor_filter = pnpitem.editor_selection
+                pnpitem.editor_cbx_items = names_visible
+            # not items_filtered(): the filter may be changed while the items are added
+            out.items_all().append(pnpitem)
+        match_cache.save()
 
     return out
 
 
 def __process_pnpitem(pnpitem: PnPEditorItem, components: ComponentsDB, names_visible: list[str],
-                      cache: dict, reference: RefItems) -> PnPEditorItem:
+                      cache: dict, match_cache: MatchCache, reference: RefItems,
+                      history: ReferenceIndex) -> PnPEditorItem:
     # cache the component matching results:
     USE_CACHE = True
 
@@ -409,9 +450,20 @@ def __process_pnpitem(pnpitem: PnPEditorItem, components: ComponentsDB, names_vi
         # iterating over WiP items
         if pnpitem.marker.value == Marker.FILTER:
             __try_find_matching(components, names_visible, pnpitem)
+    elif selection := __find_reference(components, pnpitem, reference, history):
+        # the reference and the history may change: not stored in the match_cache
+        pnpitem.editor_selection = selection
+        pnpitem.editor_filter = pnpitem.editor_selection
+        pnpitem.marker.value = Marker.AUTO_SEL
+        logger.info(f"  Reference component found for {pnpitem.id}: {selection}")
+    elif match_cache and (entry := match_cache.get(repr(pnpitem))):
+        # matched in one of the previous sessions
+        __apply_match(components, names_visible, pnpitem, *entry)
     else:
         # iterating over Project items
-        __try_find_exact(components, names_visible, pnpitem, reference)
+        needle = __try_find_exact(components, names_visible, pnpitem)
+        if match_cache:
+            match_cache.put(repr(pnpitem), pnpitem.marker.value, pnpitem.editor_selection, needle)
 
     if USE_CACHE:
         cached = {
@@ -424,39 +476,66 @@ def __process_pnpitem(pnpitem: PnPEditorItem, components: ComponentsDB, names_vi
     return pnpitem
 
 
-def __try_find_exact(components: ComponentsDB, names_visible: list[str],
-                     pnpitem: PnPEditorItem, reference: RefItems = None):
+def __apply_match(components: ComponentsDB, names_visible: list[str], pnpitem: PnPEditorItem,
+                  marker: str, selection: str, needle: str):
+    """Restore the result of matching stored in the MatchCache; the proposition lists are recomputed"""
+    pnpitem.editor_selection = selection
+    pnpitem.editor_filter = pnpitem.editor_selection
+    if marker == Marker.FILTER:
+        # MRU items are at the top of the list
+        pnpitem.editor_cbx_items = components.arranged_candidates(selection, needle)
+    elif marker == Marker.NOMATCH:
+        pnpitem.editor_cbx_items = __similar_names(components, names_visible, pnpitem)
+    pnpitem.marker.value = marker
+
+
+def __similar_names(components: ComponentsDB, names_visible: list[str], pnpitem: PnPEditorItem) -> list[str]:
+    """The NOMATCH proposition list: the most similar components"""
+    return components.name_ranker().rank(pnpitem.footprint + " " + pnpitem.comment) or names_visible
+
+
+def __find_reference(components: ComponentsDB, pnpitem: PnPEditorItem,
+                     reference: RefItems, history: ReferenceIndex) -> str:
+    """
+    Returns the component selected for the footprint and comment in the reference project,
+    or in the past projects if the component is still valid
+    """
+    if reference:
+        if selection := reference.find(pnpitem.footprint, pnpitem.comment):
+            return selection
+    if history:
+        if (selection := history.find(pnpitem.footprint, pnpitem.comment)) and components.find_visible(selection):
+            return selection
+    return None
+
+
+def __try_find_exact(components: ComponentsDB, names_visible: list[str], pnpitem: PnPEditorItem) -> str:
     """
     Try to find exact component using footprint and comment
+    :return: filter used to match the component, if not found exact
     """
     ftprint = pnpitem.footprint
     cmnt = pnpitem.comment
 
-    try:
-        if reference:
-            if selection := reference.find(ftprint, cmnt):
-                # match found in the reference project
-                pnpitem.editor_selection = selection
-                pnpitem.editor_filter = pnpitem.editor_selection
-                pnpitem.marker.value = Marker.AUTO_SEL
-                logger.info(f"  Reference component found for {pnpitem.id}: {selection}")
-                return
-
-        expected_component = ftprint + "_" + cmnt
-        # raise exception if not found:
-        names_visible.index(expected_component)
-        # if we are here - matching comonent was found
-        pnpitem.editor_selection = expected_component
-        pnpitem.editor_filter = pnpitem.editor_selection
-        pnpitem.marker.value = Marker.AUTO_SEL
-        logger.info(f"  Matching component found for {pnpitem.id}: {expected_component}")
-    except Exception:
-        __try_find_matching(components, names_visible, pnpitem)
+    expected_component = ftprint + "_" + cmnt
+    # the component may be known under a different name, or with the value written differently ("10K" vs "10k0")
+    component = (components.find_visible(expected_component)
+                 or components.find_by_alias(expected_component)
+                 or components.find_canonical(expected_component))
+    if component is None:
+        return __try_find_matching(components, names_visible, pnpitem)
+
+    pnpitem.editor_selection = component.name
+    pnpitem.editor_filter = pnpitem.editor_selection
+    pnpitem.marker.value = Marker.AUTO_SEL
+    logger.info(f"  Matching component found for {pnpitem.id}: {component.name}")
+    return ""
 
 
-def __try_find_matching(components: ComponentsDB, names_visible: list[str], pnpitem: PnPEditorItem):
+def __try_find_matching(components: ComponentsDB, names_visible: list[str], pnpitem: PnPEditorItem) -> str:
     """
     Try to match component from the DB using item footprint nad comment
+    :return: filter used to match the component
     """
     ftprint = pnpitem.footprint
     cmnt = pnpitem.comment
@@ -523,22 +602,76 @@ def __try_find_matching(components: ComponentsDB, names_visible: list[str], pnpi
     # create a proposition list based on a footprint and a comment
     fltr = ftprint_found + " " + cmnt
     fltr = fltr.strip()
-    filtered_comp_names = list(item.name for item in components.components_filtered(fltr))
+    # MRU items are at the top of the list
+    filtered_comp_names = components.arranged_candidates(fltr.lower(), fltr)
 
     if len(filtered_comp_names) > 0:
         pnpitem.editor_selection = fltr.lower()
         pnpitem.editor_filter = pnpitem.editor_selection
         pnpitem.editor_cbx_items = filtered_comp_names
         pnpitem.marker.value = Marker.FILTER
-        # insert MRU items at the top of the `cbx_items` list
-        components.mru_items.arrange(pnpitem.editor_selection, pnpitem.editor_cbx_items)
-        return
+        return fltr
 
-    # no match - leave the filter, but assign all components
+    # no match - leave the filter, but propose the most similar components
     pnpitem.editor_selection = fltr.lower()
     pnpitem.editor_filter = pnpitem.editor_selection
-    pnpitem.editor_cbx_items = names_visible
+    pnpitem.editor_cbx_items = __similar_names(components, names_visible, pnpitem)
     pnpitem.marker.value = Marker.NOMATCH
+    return fltr
+
+def rematch_items(components: ComponentsDB, items: list[PnPEditorItem], modified_names: list[str]) -> list[PnPEditorItem]:
+    """
+    Matches again the NOMATCH and FILTER items, whose filter or expected name
+    is matched by the name or aliases of one of the modified components.
+    Returns the updated items
+    """
+    # name;aliases of the modified components, like in the components_filtered()
+    modified_texts = []
+    modified_keys = set()
+    for name in modified_names:
+        component = components.find(name)
+        aliases = component.aliases if component else ""
+        modified_texts.append(f"{name};{aliases}".casefold())
+        modified_keys.add(name.casefold())
+        modified_keys.add(value_canon.canonical_key(name))
+        modified_keys.update(alias.strip().casefold() for alias in aliases.split(";") if alias.strip())
+
+    # many items share the same filter: test every filter once
+    affected_filters: dict[str, bool] = {}
+    names_visible = None
+    updated = []
+
+    for pnpitem in items:
+        if pnpitem.marker.value not in (Marker.NOMATCH, Marker.FILTER):
+            continue
+
+        fltr = pnpitem.editor_filter
+        if (affected := affected_filters.get(fltr)) is None:
+            # case-insensitive: a superset of the items that may be affected
+            needle = '*' + '*'.join(fltr.casefold().split(' ')) + '*'
+            match = re.compile(fnmatch.translate(needle)).match
+            affected = any(match(text) for text in modified_texts)
+            affected_filters[fltr] = affected
+
+        expected_component = pnpitem.footprint + "_" + pnpitem.comment
+        if not (affected or expected_component.casefold() in modified_keys
+                or value_canon.canonical_key(expected_component) in modified_keys):
+            continue
+
+        if names_visible is None:
+            names_visible = components.names_visible()
+
+        # the filter applied by the user changes only the editor_filter
+        if pnpitem.marker.value == Marker.NOMATCH or pnpitem.editor_filter == pnpitem.editor_selection:
+            pnpitem.editor_cbx_items = []
+            pnpitem.marker.reset()
+            __try_find_exact(components, names_visible, pnpitem)
+        else:
+            # keep the filter entered by the user, refresh the list
+            pnpitem.editor_cbx_items = components.arranged_candidates(pnpitem.editor_filter)
+        updated.append(pnpitem)
+
+    return updated
 
 # -----------------------------------------------------------------------------
 
@@ -615,5 +748,5 @@ def ref_load(ref_path: str) -> tuple[bool, str, RefItems]:
         return (False, f"Error while parsing the JSON data: {e}", None)
 
     ref_items.prepare()
-    logger.info(f"  Done ({ref_items.count()} selected components found)")
+    logger.info(f"  Done ({ref_items.count()} selected components found, {len(ref_items.conflicts())} conflicts)")
     return (True, "", ref_items)
@@ -16,6 +16,7 @@ class Project:
         self.pnp_path = "<pnp_fpath>"
         self.pnp2_path = ""
         self.pnp_separator = "SPACES"
+        self.pnp_regex = ""
         self.pnp_grid: text_grid.TextGrid = None
         self.pnp_grid_dirty = False
         self.pnp_first_row = 0
@@ -34,6 +35,7 @@ class Project:
             'pnp_path': self.pnp_path,
             'pnp2_path': self.pnp2_path,
             'pnp_separator': self.pnp_separator,
+            'pnp_regex': self.pnp_regex,
             'pnp_first_row': self.pnp_first_row,
             'pnp_last_row': self.pnp_last_row,
             'pnp_columns': self.pnp_columns.serialize(),
@@ -48,6 +50,7 @@ class Project:
             self.pnp_path = inp['pnp_path']
             self.pnp2_path = inp['pnp2_path']
             self.pnp_separator = inp['pnp_separator']
+            self.pnp_regex = inp.get('pnp_regex', '')
             self.pnp_first_row = inp['pnp_first_row']
             self.pnp_last_row = inp.get('pnp_last_row', 0)
             self.pnp_columns.deserialize(inp['pnp_columns'])
@@ -94,7 +97,7 @@ class Project:
         elif path_lower.endswith("ods"):
             self.pnp_grid = ods_reader.read_ods_sheet(path)
         else: # assume CSV
-            self.pnp_grid = csv_reader.read_csv(path, delim)
+            self.pnp_grid = csv_reader.read_csv(path, delim, self.pnp_regex)
 
         log_f = logger.info if self.pnp_grid.nrows > 0 else logger.warning
         log_f(f"  PnP: {self.pnp_grid.nrows} rows x {self.pnp_grid.ncols} cols")
@@ -110,7 +113,7 @@ class Project:
             elif path2_lower.endswith("ods"):
                 pnp2_grid = ods_reader.read_ods_sheet(path2)
             else: # assume CSV
-                pnp2_grid = csv_reader.read_csv(path2, delim)
+                pnp2_grid = csv_reader.read_csv(path2, delim, self.pnp_regex)
 
             log_f = logger.info if pnp2_grid.nrows > 0 else logger.warning
             log_f(f"PnP2: {pnp2_grid.nrows} rows x {pnp2_grid.ncols} cols")
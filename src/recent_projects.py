@@ -0,0 +1,97 @@
+#
+# 2026-10-19
+#
+
+import collections
+import hashlib
+import json
+import logger
+import os
+
+from persistence import PersistScheduler
+
+# -----------------------------------------------------------------------------
+
+class RecentProjects:
+    """
+    Singleton keeping the settings of the recently opened PnP files,
+    limited to the MAX_ENTRIES most recently used.
+    """
+
+    FILE_NAME = "yedytor_recent.json"
+    MAX_ENTRIES = 100
+    _instance = None
+
+    @staticmethod
+    def instance():
+        """Returns singleton object"""
+        if RecentProjects._instance is None:
+            RecentProjects._instance = RecentProjects()
+        return RecentProjects._instance
+
+    def __init__(self):
+        self.__entries: collections.OrderedDict[str, dict] = collections.OrderedDict()
+        """path key : settings; the most recently used at the end"""
+
+        if os.path.isfile(self.FILE_NAME):
+            try:
+                with open(self.FILE_NAME, "r", encoding="utf-8") as f:
+                    for (key, settings) in json.load(f):
+                        self.__entries[key] = settings
+            except Exception as e:
+                logger.error(f"Cannot read the recent projects file: {e}")
+
+    @staticmethod
+    def path_key(path: str) -> str:
+        """Returns the key of the path, the same for all spellings of the path"""
+        norm_path = os.path.normcase(os.path.normpath(path)).casefold()
+        return hashlib.sha1(norm_path.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def __legacy_key(ini_key: str) -> str:
+        return "ini:" + ini_key
+
+    @staticmethod
+    def legacy_ini_key(path: str) -> str:
+        """Key of the path in the [recent] section of the old yedytor.ini"""
+        return path.lower().replace(" ", "_").replace(":", "")
+
+    def get(self, path: str) -> dict:
+        """Returns the settings of the path, or None"""
+        key = self.path_key(path)
+        if settings := self.__entries.get(key):
+            return settings
+
+        # imported from the yedytor.ini: take over the entry
+        if settings := self.__entries.pop(self.__legacy_key(self.legacy_ini_key(path)), None):
+            settings["path"] = path
+            self.__entries[key] = settings
+            self.__save()
+        return settings
+
+    def put(self, path: str, settings: dict):
+        """Stores the settings of the path as the most recently used"""
+        key = self.path_key(path)
+        self.__entries[key] = dict(settings, path=path)
+        self.__entries.move_to_end(key)
+        self.__evict()
+        self.__save()
+
+    def import_legacy(self, ini_entries: dict[str, dict]):
+        """Imports entries of the old [recent] section, keyed by the mangled path"""
+        for (ini_key, settings) in reversed(list(ini_entries.items())):
+            key = self.__legacy_key(ini_key)
+            if key not in self.__entries:
+                self.__entries[key] = settings
+                # older than anything already stored
+                self.__entries.move_to_end(key, last=False)
+        self.__evict()
+        self.__save()
+
+    def __evict(self):
+        while len(self.__entries) > self.MAX_ENTRIES:
+            self.__entries.popitem(last=False)
+
+    def __save(self):
+        content = json.dumps(list(self.__entries.items()), indent=1)
+        PersistScheduler.instance().schedule(self.FILE_NAME, content)
@@ -0,0 +1,195 @@
+#
+# 2026-10-19
+#
+# Builds the index of the footprint+comment -> component selections made in the past PnP projects.
+# Usage:
+#   python reference_index.py PROJECTS_FOLDER [--db ../db] [--policy frequent|recent] [--workers N]
+#
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import logger
+
+# -----------------------------------------------------------------------------
+
+WIP_SUFFIX = "_wip.json"
+SELECTED_MARKERS = ("AUTO_SEL", "MAN_SEL")
+"""Marker.AUTO_SEL, Marker.MAN_SEL; the pnp_editor_helpers is not imported, as it requires the UI modules"""
+
+POLICY_FREQUENT = "frequent"
+POLICY_RECENT = "recent"
+
+# -----------------------------------------------------------------------------
+
+class ReferenceIndex:
+    """
+    Selections of the past WiP files, in the SQLite file keyed by the footprint+comment.
+    Lookups are made with a single connection, opened on the first find().
+    """
+
+    FILE_NAME = "reference_index.sqlite3"
+
+    def __init__(self, db_folder: str):
+        self.path = os.path.join(db_folder, self.FILE_NAME)
+        """full filepath"""
+        self.__con: sqlite3.Connection = None
+
+    def exists(self) -> bool:
+        return os.path.isfile(self.path)
+
+    @staticmethod
+    def key(footprint: str, comment: str) -> str:
+        """The same as the repr() of the PnPEditorItem"""
+        return footprint + "|" + comment
+
+    def find(self, footprint: str, comment: str) -> str:
+        """Returns the selection made for the footprint+comment, or None"""
+        if self.__con is None:
+            # read-only: the index is rebuilt by replacing the file
+            self.__con = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+        row = self.__con.execute("SELECT selection FROM refs WHERE key = ?", (self.key(footprint, comment),)).fetchone()
+        return row[0] if row else None
+
+    def close(self):
+        if self.__con is not None:
+            self.__con.close()
+            self.__con = None
+
+    def write(self, entries: dict[str, tuple[str, int, float]], sources: int):
+        """
+        Replaces the index with the entries: key : (selection, number of projects, newest project time)
+        """
+        tmp_path = self.path + ".tmp"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+        con = sqlite3.connect(tmp_path)
+        try:
+            with con:
+                con.execute("CREATE TABLE refs ("
+                            " key TEXT PRIMARY KEY,"
+                            " selection TEXT NOT NULL,"
+                            " uses INTEGER NOT NULL,"
+                            " updated REAL NOT NULL"
+                            ") WITHOUT ROWID")
+                con.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+                con.executemany("INSERT INTO refs(key, selection, uses, updated) VALUES(?, ?, ?, ?)",
+                                ((key, selection, uses, updated) for (key, (selection, uses, updated)) in entries.items()))
+                con.executemany("INSERT INTO meta(key, value) VALUES(?, ?)",
+                                (("sources", str(sources)), ("built", time.strftime("%Y-%m-%d, %H:%M:%S"))))
+        finally:
+            con.close()
+        # the index is never seen half-written
+        os.replace(tmp_path, self.path)
+
+# -----------------------------------------------------------------------------
+
+def find_wip_files(root_folder: str) -> list[str]:
+    """Returns paths of all the WiP files in the folder tree"""
+    paths = []
+    for (folder, _, fnames) in os.walk(root_folder):
+        paths.extend(os.path.join(folder, fname) for fname in fnames if fname.endswith(WIP_SUFFIX))
+    return paths
+
+def read_selections(wip_path: str) -> tuple[float, list[tuple[str, str]]]:
+    """Returns: [modification time of the file, (key, selection) of the selected components]"""
+    mtime = os.path.getmtime(wip_path)
+    with open(wip_path, "r", encoding="utf-8") as f:
+        wip = json.load(f)
+
+    selections = []
+    for wip_item in wip['components']:
+        if wip_item['marker'] not in SELECTED_MARKERS or not wip_item['selection']:
+            continue
+        if 'summary' in wip_item:
+            # new format
+            (footprint, comment) = (wip_item['footprint'], wip_item['comment'])
+        else:
+            # old format
+            # "item": "R226 | 0805                    | 1K/0,125W ",
+            subitems = wip_item['item'].split('|')
+            (footprint, comment) = (subitems[1].strip(), subitems[2].strip())
+        selections.append((ReferenceIndex.key(footprint, comment), wip_item['selection']))
+    return (mtime, selections)
+
+def __read_or_skip(wip_path: str) -> tuple[float, list[tuple[str, str]]]:
+    try:
+        return read_selections(wip_path)
+    except Exception as e:
+        logger.warning(f"  Skipped '{wip_path}': {e}")
+        return (0.0, [])
+
+def build(root_folder: str, db_folder: str, policy: str = POLICY_FREQUENT, workers: int = 8) -> str:
+    """
+    Reads all the WiP files in the root_folder tree and writes the index to the db_folder.
+    Of several selections of the same footprint+comment, keeps the one made in the most projects,
+    or in the most recent project.
+    Returns a summary.
+    """
+    logger.info(f"Build the reference index of: {root_folder}")
+    started_at = time.monotonic()
+    wip_paths = find_wip_files(root_folder)
+
+    # key : selection : [number of projects, newest project time]
+    votes: dict[str, dict[str, list]] = {}
+    sources = 0
+    # the files may be on a network drive: read them in parallel
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="reference_index") as executor:
+        for (mtime, selections) in executor.map(__read_or_skip, wip_paths):
+            if not selections:
+                continue
+            sources += 1
+            # a project votes once for each footprint+comment
+            for (key, selection) in dict(selections).items():
+                candidates = votes.setdefault(key, {})
+                if vote := candidates.get(selection):
+                    vote[0] += 1
+                    vote[1] = max(vote[1], mtime)
+                else:
+                    candidates[selection] = [1, mtime]
+
+    if policy == POLICY_RECENT:
+        rank = lambda item: (item[1][1], item[1][0])
+    else:
+        rank = lambda item: (item[1][0], item[1][1])
+
+    entries = {}
+    conflicts = 0
+    for (key, candidates) in votes.items():
+        (selection, (uses, updated)) = max(candidates.items(), key=rank)
+        entries[key] = (selection, uses, updated)
+        conflicts += len(candidates) > 1
+
+    ReferenceIndex(db_folder).write(entries, sources)
+    summary = f"{len(entries)} footprint+comment selections from {sources} of {len(wip_paths)} WiP files " \
+              f"({conflicts} with different selections), built in {time.monotonic() - started_at:.1f}s"
+    logger.info(f"  {summary}")
+    return summary
+
+# -----------------------------------------------------------------------------
+
+def __main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description="Build the reference index from the past WiP files")
+    parser.add_argument("folder", help="folder tree with the *_wip.json files")
+    parser.add_argument("--db", default=os.path.join(os.path.dirname(__file__), "..", "db"),
+                        help="components DB folder, where the index is written")
+    parser.add_argument("--policy", choices=(POLICY_FREQUENT, POLICY_RECENT), default=POLICY_FREQUENT,
+                        help="which of the different selections is kept")
+    parser.add_argument("--workers", type=int, default=8, help="number of files read in parallel")
+    args = parser.parse_args(argv)
+    logger.config(False)
+
+    if not os.path.isdir(args.db):
+        print(f"DB folder not found: {args.db}")
+        return 1
+    print(build(args.folder, args.db, args.policy, args.workers))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(__main(sys.argv[1:]))
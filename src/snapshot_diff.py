@@ -0,0 +1,150 @@
+#
+# 2026-10-19
+#
+# Compares the components__*.csv snapshots of the components DB.
+# Usage:
+#   python snapshot_diff.py OLD.csv NEW.csv
+#   python snapshot_diff.py --folder ../db [--last N] [--summary]
+#
+
+import argparse
+import csv
+import os
+import sys
+import typing
+
+import logger
+import text_encoding
+from components_manifest import SnapshotsManifest
+
+# -----------------------------------------------------------------------------
+
+class SnapshotDiff:
+    """Changes between two snapshots"""
+
+    def __init__(self, old_path: str, new_path: str):
+        self.old_path = old_path
+        self.new_path = new_path
+        self.added: list[str] = []
+        """components present only in the new snapshot"""
+        self.removed: list[str] = []
+        """components present only in the old snapshot"""
+        self.hidden: list[str] = []
+        """components hidden in the new snapshot"""
+        self.unhidden: list[str] = []
+        """components no longer hidden in the new snapshot"""
+        self.realiased: list[tuple[str, str]] = []
+        """(name, new aliases) of components with modified aliases"""
+
+    def is_empty(self) -> bool:
+        return not (self.added or self.removed or self.hidden or self.unhidden or self.realiased)
+
+    def summary(self) -> str:
+        return f"{os.path.basename(self.old_path)} -> {os.path.basename(self.new_path)}: " \
+               f"+{len(self.added)} -{len(self.removed)} " \
+               f"hidden {len(self.hidden)}, unhidden {len(self.unhidden)}, aliases {len(self.realiased)}"
+
+    def report(self) -> str:
+        lines = [self.summary()]
+        lines.extend(f"  + {name}" for name in self.added)
+        lines.extend(f"  - {name}" for name in self.removed)
+        lines.extend(f"  H {name}" for name in self.hidden)
+        lines.extend(f"  V {name}" for name in self.unhidden)
+        lines.extend(f"  A {name}: \"{aliases}\"" for (name, aliases) in self.realiased)
+        return "\n".join(lines)
+
+# -----------------------------------------------------------------------------
+
+SnapshotIndex = dict[str, tuple[bool, int]]
+"""name : (hidden, hash of the aliases)"""
+
+def __read_rows(path: str) -> typing.Iterator[tuple[str, bool, str]]:
+    """Yields (name, hidden, aliases), the same way the ComponentsDB reads them"""
+    encoding = text_encoding.detect_file(path)
+    with open(path, "r", encoding=encoding, errors="replace", newline="") as f:
+        for row in csv.reader(f, delimiter="\t"):
+            if len(row) < 2:
+                continue
+            aliases = row[2].strip() if len(row) >= 3 else ""
+            yield (row[0].strip(), row[1].strip() == "x", aliases)
+
+def __compare(old_index: SnapshotIndex, old_path: str, new_path: str) -> tuple[SnapshotDiff, SnapshotIndex]:
+    """Streams the new snapshot against the index of the old one; returns the diff and the new snapshot index"""
+    diff = SnapshotDiff(old_path, new_path)
+    new_index: SnapshotIndex = {}
+
+    for (name, hidden, aliases) in __read_rows(new_path):
+        entry = (hidden, hash(aliases))
+        new_index[name] = entry
+        old_entry = old_index.get(name)
+        if old_entry is None:
+            diff.added.append(name)
+        elif old_entry != entry:
+            if old_entry[0] != hidden:
+                (diff.hidden if hidden else diff.unhidden).append(name)
+            if old_entry[1] != entry[1]:
+                diff.realiased.append((name, aliases))
+
+    diff.removed = [name for name in old_index if name not in new_index]
+    return (diff, new_index)
+
+def read_index(path: str) -> SnapshotIndex:
+    return {name: (hidden, hash(aliases)) for (name, hidden, aliases) in __read_rows(path)}
+
+def diff_snapshots(old_path: str, new_path: str) -> SnapshotDiff:
+    """Returns changes made between the old and the new snapshot"""
+    return __compare(read_index(old_path), old_path, new_path)[0]
+
+def diff_series(paths: list[str]) -> typing.Iterator[SnapshotDiff]:
+    """Yields diffs of the consecutive snapshots; every file is read only once"""
+    if len(paths) < 2:
+        return
+
+    index = read_index(paths[0])
+    for (old_path, new_path) in zip(paths, paths[1:]):
+        (diff, index) = __compare(index, old_path, new_path)
+        yield diff
+
+def snapshots_in_folder(db_folder: str, include_archive: bool = True) -> list[str]:
+    """Returns paths of all the snapshots, the oldest first"""
+    folders = [db_folder]
+    if include_archive:
+        folders.append(os.path.join(db_folder, SnapshotsManifest.ARCHIVE_FOLDER))
+
+    fnames = {}
+    for folder in folders:
+        if not os.path.isdir(folder):
+            continue
+        for de in os.scandir(folder):
+            if de.name.startswith("components__") and de.name.endswith(".csv"):
+                fnames[de.name] = de.path
+    # file names contain the date
+    return [fnames[fname] for fname in sorted(fnames)]
+
+# -----------------------------------------------------------------------------
+
+def __main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description="Compare the components DB snapshots")
+    parser.add_argument("snapshots", nargs="*", help="OLD.csv NEW.csv")
+    parser.add_argument("--folder", help="compare all consecutive snapshots in the DB folder")
+    parser.add_argument("--last", type=int, default=0, help="with --folder: only the N latest snapshots")
+    parser.add_argument("--summary", action="store_true", help="print only the number of changes")
+    args = parser.parse_args(argv)
+    logger.config(False)
+
+    if args.folder:
+        paths = snapshots_in_folder(args.folder)
+        if args.last > 0:
+            paths = paths[-args.last:]
+    elif len(args.snapshots) == 2:
+        paths = args.snapshots
+    else:
+        parser.print_usage()
+        return 1
+
+    for diff in diff_series(paths):
+        print(diff.summary() if args.summary else diff.report())
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(__main(sys.argv[1:]))
@@ -0,0 +1,77 @@
+#
+# 2026-10-19
+#
+
+import os
+import tkinter
+
+import customtkinter
+
+import logger
+import ui_helpers
+import snapshot_diff
+
+# -----------------------------------------------------------------------------
+
+class SnapshotDiffWindow(customtkinter.CTkToplevel):
+    def __init__(self, *args, **kwargs):
+        """
+        app=main wnd, so we know how to center the popup
+        db_folder=str - folder with the components DB snapshots
+        """
+        assert "app" in kwargs
+        app = kwargs.pop("app")
+
+        assert "db_folder" in kwargs
+        db_folder = kwargs.pop("db_folder")
+
+        super().__init__(*args, **kwargs)
+        ui_helpers.window_set_centered(app, self, 700, 600)
+        self.title("Components DB snapshots diff")
+
+        # newest first
+        self.snapshots = {os.path.basename(path): path for path in reversed(snapshot_diff.snapshots_in_folder(db_folder))}
+        names = list(self.snapshots)
+
+        lbl_old = customtkinter.CTkLabel(self, text="Old:")
+        lbl_old.grid(row=0, column=0, pady=5, padx=5, sticky="w")
+        self.cbx_old = customtkinter.CTkComboBox(self, values=names, state="readonly", width=250)
+        self.cbx_old.grid(row=0, column=1, pady=5, padx=5, sticky="w")
+        self.cbx_old.set(names[1] if len(names) > 1 else "")
+
+        lbl_new = customtkinter.CTkLabel(self, text="New:")
+        lbl_new.grid(row=1, column=0, pady=5, padx=5, sticky="w")
+        self.cbx_new = customtkinter.CTkComboBox(self, values=names, state="readonly", width=250)
+        self.cbx_new.grid(row=1, column=1, pady=5, padx=5, sticky="w")
+        self.cbx_new.set(names[0] if names else "")
+
+        self.btn_compare = customtkinter.CTkButton(self, text="Compare", command=self.button_compare_event)
+        self.btn_compare.grid(row=0, column=2, rowspan=2, pady=5, padx=5, sticky="e")
+        if len(names) < 2:
+            self.btn_compare.configure(state=tkinter.DISABLED)
+
+        self.textbox_diff = customtkinter.CTkTextbox(self,
+                                                font=customtkinter.CTkFont(size=12, family="Consolas"),
+                                                activate_scrollbars=True,
+                                                wrap='none')
+        self.textbox_diff.grid(row=2, column=0, columnspan=3, padx=5, pady=5, sticky="wens")
+
+        #
+        self.grid_columnconfigure(2, weight=1)
+        self.grid_rowconfigure(2, weight=1)
+
+        # enable "always-on-top" for this popup window
+        self.attributes('-topmost', True)
+
+    def button_compare_event(self):
+        old_path = self.snapshots.get(self.cbx_old.get())
+        new_path = self.snapshots.get(self.cbx_new.get())
+        if not (old_path and new_path):
+            return
+
+        self.textbox_diff.delete("0.0", tkinter.END)
+        try:
+            diff = snapshot_diff.diff_snapshots(old_path, new_path)
+            self.textbox_diff.insert("0.0", diff.report())
+        except Exception as e:
+            logger.error(f"Error comparing the snapshots: {e}")
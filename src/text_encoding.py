@@ -0,0 +1,72 @@
+#
+# 2026-10-19
+#
+
+import codecs
+import logger
+import typing
+
+# -----------------------------------------------------------------------------
+
+SAMPLE_SIZE = 64 * 1024
+"""Number of bytes inspected to choose the file encoding"""
+
+def __legacy_codec() -> str:
+    # "ansi" is the Windows system code page; elsewhere use the code page of the PnP files the app is used with
+    try:
+        codecs.lookup("ansi")
+        return "ansi"
+    except LookupError:
+        return "cp1250"
+
+LEGACY_ENCODING = __legacy_codec()
+"""Encoding of the files not saved as UTF-8"""
+
+T = typing.TypeVar("T")
+
+# -----------------------------------------------------------------------------
+
+def detect_bytes(sample: bytes, complete: bool = False) -> str:
+    """
+    Returns the codec name for the data starting with the `sample`.
+
+    :complete: True if the sample contains the entire data, so it must not end with a partial character
+    """
+    if sample.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    if sample.startswith(codecs.BOM_UTF16_LE) or sample.startswith(codecs.BOM_UTF16_BE):
+        return "utf-16"
+
+    try:
+        # incremental decoder tolerates a multi-byte character cut at the end of the sample
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=complete)
+        return "utf-8"
+    except UnicodeDecodeError:
+        return LEGACY_ENCODING
+
+def detect_file(path: str) -> str:
+    """Returns the codec name for the text file, inspecting its BOM and the beginning of the content"""
+    with open(path, "rb") as f:
+        sample = f.read(SAMPLE_SIZE)
+
+    encoding = detect_bytes(sample, len(sample) < SAMPLE_SIZE)
+    if encoding != "utf-8":
+        logger.debug(f"  Encoding: {encoding}")
+    return encoding
+
+def read_file(path: str, read: typing.Callable[[typing.TextIO], T]) -> T:
+    """
+    Streams the text file through the `read` function, with the codec chosen from the beginning of the file.
+    A file detected as UTF-8 may still have a non-UTF-8 character after the sample:
+    then the file is re-opened with the LEGACY_ENCODING and the `read` is called again.
+    """
+    encoding = detect_file(path)
+    # the UTF-8 guess is verified while reading; the legacy code pages decode any byte
+    errors = "strict" if encoding.startswith("utf-") else "replace"
+    try:
+        with open(path, "r", encoding=encoding, errors=errors) as f:
+            return read(f)
+    except UnicodeDecodeError as e:
+        logger.debug(f"  Not a {encoding} file ({e}), read again as {LEGACY_ENCODING}")
+        with open(path, "r", encoding=LEGACY_ENCODING, errors="replace") as f:
+            return read(f)
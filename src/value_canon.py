@@ -0,0 +1,78 @@
+#
+# 2026-10-19
+#
+# Canonical form of the component values, so the differently written values can be compared:
+#   "10K", "10k", "10k0", "10000", "10kR" -> "10000"
+#   "4k7", "4,7k", "4.7K"                 -> "4700"
+#   "1R5", "1.5R", "1,5Ω"                 -> "1.5"
+#   "100n", "100nF", "0.1uF", "0,1µ"      -> "0.0000001"
+#   "5%", "5.0%"                          -> "5%"
+#
+
+import decimal
+import functools
+import re
+
+# -----------------------------------------------------------------------------
+
+__MULTIPLIERS = {
+    "p": decimal.Decimal("1e-12"),
+    "n": decimal.Decimal("1e-9"),
+    "u": decimal.Decimal("1e-6"),
+    "µ": decimal.Decimal("1e-6"),
+    "m": decimal.Decimal("1e-3"),
+    "r": decimal.Decimal(1),
+    "k": decimal.Decimal("1e3"),
+    "M": decimal.Decimal("1e6"),
+    "G": decimal.Decimal("1e9"),
+}
+
+# 10k, 4k7, 4,7k, 1R5, 100nF, 0.1uF, 1K/0,125W
+__RE_VALUE = re.compile(r"^(\d+)(?:[.,](\d+))?([pnuµmrRkKMG])?(\d+)?(F|Ω|ohm|R|V|W|A|H)?$")
+__RE_PERCENT = re.compile(r"^(\d+(?:[.,]\d+)?)%$")
+__RE_SEPARATORS = re.compile(r"[_\s/;]+")
+
+# units implied by the value: capacitors and resistors are told apart by the multiplier anyway
+__IMPLIED_UNITS = ("F", "Ω", "ohm", "R")
+
+def __format(value: decimal.Decimal) -> str:
+    # "f" - never the exponent notation
+    return format(value.normalize(), "f")
+
+@functools.lru_cache(maxsize=65536)
+def canonical_value(token: str) -> str:
+    """Returns the canonical form of a single value, or the case-folded token if it's not a value"""
+    if match := __RE_PERCENT.match(token):
+        return __format(decimal.Decimal(match[1].replace(",", "."))) + "%"
+
+    if token[:1] == "0" and token.isdigit():
+        # 0603, 0805: a footprint size, not a value
+        return token.casefold()
+
+    if not (match := __RE_VALUE.match(token)):
+        return token.casefold()
+
+    (integral, fraction, multiplier, infix, unit) = match.groups()
+    if fraction and infix:
+        # 4.7k7 - not a value
+        return token.casefold()
+
+    if multiplier:
+        if multiplier not in "mM":
+            # "m" is milli, "M" is mega; other multipliers are case insensitive
+            multiplier = multiplier.lower()
+        # 4k7: the multiplier is the decimal point
+        fraction = fraction or infix
+    elif infix:
+        return token.casefold()
+
+    value = decimal.Decimal(f"{integral}.{fraction or 0}")
+    if multiplier:
+        value *= __MULTIPLIERS[multiplier]
+    if unit in __IMPLIED_UNITS:
+        unit = ""
+    return __format(value) + (unit or "")
+
+def canonical_key(text: str) -> str:
+    """Returns the canonical form of the text, eg. a component name: "0603_10K/1%" -> "0603_10000_1%" """
+    return "_".join(canonical_value(token) for token in __RE_SEPARATORS.split(text.strip()) if token)